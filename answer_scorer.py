@@ -0,0 +1,136 @@
+"""
+Local answer-quality scoring.
+
+Replaces the word-count heuristic with a handful of cheap features computed for
+a batch of answers at once as NumPy arrays:
+
+- length: content words on a log scale (saturates around 40 words);
+- stack_coverage: share of the candidate's tech stack tokens the answer mentions;
+- code_density: share of tokens that look like code or identifiers
+  (`snake_case`, `camelCase`, `dotted.names`, `calls()`, `ALLCAPS`, numbers);
+- question_overlap: share of the question's content terms the answer picks up;
+- lexical_density: distinct content terms per word, i.e. how much is said
+  (discounted below 8 words);
+- padding: filler words and repetition.
+
+A weighted sum gives a 0-1 score. Terse answers dense with identifiers and
+stack terms pass; long answers made of filler do not.
+
+NumPy is imported on first use, so it stays out of the app's cold start until
+the first answer is scored.
+"""
+import re
+
+FEATURES = ["length", "stack_coverage", "code_density", "question_overlap", "lexical_density", "padding"]
+WEIGHTS = (0.30, 0.15, 0.20, 0.15, 0.30, -0.45)
+SUBSTANTIVE_SCORE = 0.42  # Answers scoring below this get a follow-up
+
+# Replies that are only a way of moving on; matched against the whole answer, never inside one
+COMPLETION_PHRASES = {
+    "done", "i'm done", "im done", "thanks", "thank you", "finished", "complete", "skip", "n/a", "na", "pass",
+}
+FILLER_WORDS = {
+    "basically", "actually", "really", "very", "just", "like", "kind", "sort", "stuff", "things", "thing",
+    "know", "mean", "think", "guess", "maybe", "probably", "well", "okay", "ok", "so", "um", "uh", "yeah",
+    "literally", "totally", "definitely", "obviously", "good", "great", "nice", "whatever", "etc",
+    "sure", "idea", "dunno", "hmm",
+}
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "if", "then", "of", "to", "in", "on", "at", "by", "for", "with",
+    "from", "as", "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "these", "those",
+    "i", "we", "you", "they", "he", "she", "my", "our", "your", "their", "me", "us", "them", "would",
+    "could", "should", "will", "can", "do", "does", "did", "have", "has", "had", "not", "no", "yes",
+    "what", "how", "why", "when", "where", "which", "who", "there", "here", "about", "into", "up", "out",
+    "all", "some", "any", "more", "most", "also", "too", "than", "use", "using", "used",
+}
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_+#.]*(?:\(\))?|\d+(?:\.\d+)?")
+_CODE_TOKEN = re.compile(
+    r"^(?:\w+\(\)|[a-z]+(?:_[a-z0-9]+)+|[a-z]+[A-Z]\w*|\w+\.\w+|[A-Z]{2,}\w*|\d+(?:\.\d+)?)$"
+)
+
+
+def _tokens(text):
+    return [t.rstrip(".") for t in _WORD.findall(text or "")]
+
+
+def _terms(tokens):
+    return {t.lower() for t in tokens if t.lower() not in STOPWORDS and t.lower() not in FILLER_WORDS}
+
+
+def answer_features(answers, questions, tech_tokens=()):
+    """
+    Feature matrix of shape (len(answers), len(FEATURES)), each column in [0, 1].
+    `questions[i]` is the question `answers[i]` responds to.
+    """
+    import numpy as np
+    tokenized = [_tokens(a) for a in answers]
+    answer_terms = [_terms(t) for t in tokenized]
+    question_terms = [_terms(_tokens(q)) for q in questions]
+    stack = {t.lower() for token in tech_tokens for t in _tokens(token)}
+
+    # Term-presence matrices over one shared vocabulary
+    vocab = {term: i for i, term in enumerate(set().union(stack, *answer_terms, *question_terms))}
+    A = np.zeros((len(answers), len(vocab) or 1), dtype=bool)
+    Q = np.zeros_like(A)
+    S = np.zeros(A.shape[1], dtype=bool)
+    for i, terms in enumerate(answer_terms):
+        A[i, [vocab[t] for t in terms]] = True
+    for i, terms in enumerate(question_terms):
+        Q[i, [vocab[t] for t in terms]] = True
+    S[[vocab[t] for t in stack]] = True
+
+    words = np.array([len(t) for t in tokenized], dtype=float)
+    code = np.array([sum(bool(_CODE_TOKEN.match(t)) for t in toks) for toks in tokenized], dtype=float)
+    filler = np.array([sum(t.lower() in FILLER_WORDS for t in toks) for toks in tokenized], dtype=float)
+    distinct = np.array([len({t.lower() for t in toks}) for toks in tokenized], dtype=float)
+    content = A.sum(axis=1).astype(float)
+    safe_words = np.maximum(words, 1)
+
+    features = np.column_stack([
+        np.minimum(1.0, np.log1p(content) / np.log1p(40)),
+        (A & S).sum(axis=1) / max(1, S.sum()),
+        np.minimum(1.0, 3 * code / safe_words),
+        (A & Q).sum(axis=1) / np.maximum(Q.sum(axis=1), 1),
+        np.minimum(1.0, 2 * content / safe_words) * np.minimum(1.0, words / 8),
+        np.minimum(1.0, filler / safe_words + (1 - distinct / safe_words) * (words > 8)),
+    ])
+    features[words == 0] = 0.0
+    return features
+
+
+def score_answers(answers, questions, tech_tokens=()):
+    """0-1 quality score for each answer."""
+    import numpy as np
+
+    if not len(answers):
+        return np.zeros(0)
+    return (answer_features(answers, questions, tech_tokens) @ WEIGHTS).clip(0.0, 1.0)
+
+
+def is_substantive(answer, question="", tech_tokens=()):
+    """True when an answer is good enough to move on without a follow-up."""
+    if (answer or "").lower().strip(" \t\n.!?") in COMPLETION_PHRASES:
+        return False
+    return bool(score_answers([answer], [question], tech_tokens)[0] >= SUBSTANTIVE_SCORE)
+
+
+def feature_summary(qa_entries, tech_tokens=()):
+    """
+    One compact line per question with the score and main features of its combined
+    answers, e.g. "Q1 score=0.71 words=58 stack=0.50 code=0.12 overlap=0.40 padding=0.05".
+    """
+    qa_entries = list(qa_entries)
+    answers = [" ".join(qa.answers) for qa in qa_entries]
+    questions = [qa.question for qa in qa_entries]
+    if not answers:
+        return ""
+    features = answer_features(answers, questions, tech_tokens)
+    scores = (features @ WEIGHTS).clip(0.0, 1.0)
+    columns = {name: features[:, i] for i, name in enumerate(FEATURES)}
+    return "\n".join(
+        f"Q{i+1} score={scores[i]:.2f} words={len(_tokens(answers[i]))} "
+        f"stack={columns['stack_coverage'][i]:.2f} code={columns['code_density'][i]:.2f} "
+        f"overlap={columns['question_overlap'][i]:.2f} padding={columns['padding'][i]:.2f}"
+        for i in range(len(answers))
+    )
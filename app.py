@@ -1,9 +1,36 @@
+import time
+RERUN_STARTED = time.perf_counter() # Start of this script run (see the "rerun" span at the end)
 import streamlit as st
-import google.generativeai as genai
 import os
 import json
+import uuid
+import sys
 import re
-from google.api_core import exceptions # Imported but not explicitly used for error handling type in current version
+import hmac
+import secrets
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from streamlit.errors import StreamlitAPIException
+from session_model import InterviewState, QAEntry, import_legacy_file
+from session_store import SessionStore
+from screening_index import ScreeningIndex
+from candidate_index import CandidateIndex
+from question_bank import (
+    MAX_QUESTIONS, MIN_QUESTIONS, QuestionBank, dedupe, fallback_questions, select_questions, tokens_to_generate
+)
+from llm_cache import ResponseCache
+from llm_executor import LLMDeadlineError, LLMExecutor, LLMTimeoutError
+from llm_scheduler import QueueTimeoutError, RequestScheduler, estimate_tokens
+from llm_backend import create_backend
+from metrics import Metrics
+from intake import CANDIDATE_FIELDS, REQUIRED_FIELDS, candidate_key, extract_candidate_info, validate_candidate_info
+from screening import (
+    ASSESSMENT_TEMPLATE, build_assessment_prompt, build_extraction_prompt, build_follow_up_prompt,
+    build_intake_prompt, build_tech_questions_prompt, first_name, intake_response_schema, is_substantive_answer,
+    parse_extraction_response, parse_intake_response, parse_structured_questions, preview_questions, answer_diverges,
+    tech_stack_tokens
+)
+import screening
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -13,405 +40,642 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- CSS Styling ---
-st.markdown("""
-<style>
-body, html {
-    font-family: 'Segoe UI', sans-serif;
-    /* Removed explicit background-color to let Streamlit's theme control the main page background */
-}
+# --- Static Assets ---
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
 
-/* Ensure general text within Streamlit containers is visible */
-div[data-testid="stVerticalBlock"],
-div[data-testid="stHorizontalBlock"],
-div[data-testid="stMarkdownContainer"] {
-    color: var(--text-color); /* Use Streamlit's theme variable for text color */
-}
+@st.cache_resource
+def get_stylesheet():
+    """The app's stylesheet (style.css), read once per process instead of on every rerun."""
+    with open(os.path.join(APP_DIR, "style.css"), "r", encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
 
-/* Specific styling for custom message bubbles */
-.message {
-    border-radius: 10px;
-    padding: 0.9rem 1.1rem;
-    margin-bottom: 0.75rem;
-    font-size: 15px;
-    max-width: 85%;
-    line-height: 1.6;
-    word-wrap: break-word;
-    margin-top: 0.5rem;
-    margin-bottom: 0.5rem;
-    box-shadow: 0 1px 3px rgba(0,0,0,0.08);
-}
-.user {
-    background-color: #e7f1ff; /* Light blue for user messages */
-    color: #1a1a1a; /* Dark text for user messages */
-    align-self: flex-end;
-    margin-left: auto;
-    border: 1px solid #d0e0ff;
-}
-.assistant {
-    background-color: #f9f9f9; /* Very light gray for assistant messages */
-    color: #1a1a1a; /* Dark text for assistant messages */
-    border: 1px solid #e0e0e0;
-    align-self: flex-start;
-    margin-right: auto;
-}
+@st.cache_resource
+def get_logo():
+    """The sidebar logo's bytes, read once per process."""
+    with open(os.path.join(APP_DIR, "images.png"), "rb") as f:
+        return f.read()
 
-/* Sidebar Titles and Descriptions */
-.sidebar-title {
-    font-size: 24px;
-    font-weight: bold;
-    color: var(--text-color); /* Use Streamlit's theme variable */
-    margin-bottom: 0.5rem;
-}
-.sidebar-desc {
-    font-size: 14px;
-    color: var(--text-color); /* Use Streamlit's theme variable */
-    margin-bottom: 1.5rem;
-}
+st.markdown(get_stylesheet(), unsafe_allow_html=True)
 
-/* Textarea for user input */
-textarea {
-    border: 1px solid var(--border-color) !important; /* Use Streamlit's theme variable */
-    border-radius: 8px !important;
-    padding: 0.75rem !important;
-    font-size: 15px !important;
-    background-color: var(--secondary-background-color) !important; /* Ensure it contrasts */
-    color: var(--text-color) !important; /* Ensure text is visible */
-}
+# --- API Setup ---
+MODEL_NAME = "models/gemini-1.5-flash"
 
-/* Main Streamlit Button */
-.st-emotion-cache-1c7y2vl.eczjsme11 { /* This is the "Send" button */
-    background-color: #2e72d2;
-    color: white; /* Ensure text is white */
-    padding: 0.6rem 1.5rem;
-    border-radius: 6px;
-    font-size: 14px;
-    cursor: pointer;
-    border: none;
-}
-.st-emotion-cache-1c7y2vl.eczjsme11:hover {
-    background-color: #1a56a4;
-    color: white; /* Ensure text remains white on hover */
-}
+def get_secret(name):
+    """Reads a Streamlit secret, treating a missing secrets.toml like a missing key."""
+    try:
+        return st.secrets.get(name)
+    except Exception:
+        return None
 
-/* General Streamlit Button */
-div.stButton > button {
-    background-color: var(--secondary-background-color); /* Use Streamlit's theme variable */
-    color: var(--text-color); /* Use Streamlit's theme variable */
-    border: 1px solid var(--border-color); /* Use Streamlit's theme variable */
-    border-radius: 6px;
-    padding: 0.4rem 1.2rem;
-    font-size: 14px;
-    cursor: pointer;
-    transition: all 0.2s ease;
-}
-div.stButton > button:hover {
-    background-color: var(--background-color); /* Lighter hover in both themes */
-}
+# Model backend: "gemini" (default), "fake" (scripted, offline), "record" or "replay" (fixtures)
+BACKEND_MODE = os.getenv("TALENTSCOUT_BACKEND") or get_secret("model_backend") or "gemini"
 
-/* Hide Streamlit default elements */
-#MainMenu, header, footer {
-    visibility: hidden;
-}
+gemini_api_key = get_secret("google_gemini_api_key") or os.getenv("GOOGLE_API_KEY")
+if BACKEND_MODE in ("gemini", "record") and not gemini_api_key:
+    st.error("Gemini API Key not found. Please set it in `.streamlit/secrets.toml` or as an environment variable `GOOGLE_API_KEY`.")
+    st.stop()
 
-/* Spinner color */
-.stSpinner > div > div {
-    border-top-color: #2e72d2;
-}
+@st.cache_resource
+def get_model():
+    """
+    One model client shared by every browser session. Importing and configuring the SDK
+    happens once per process, on the first model call rather than on page load.
+    """
+    return create_backend(
+        BACKEND_MODE,
+        MODEL_NAME,
+        api_key=gemini_api_key,
+        fixtures_path=os.getenv("TALENTSCOUT_FIXTURES"),
+        fake_script=os.getenv("TALENTSCOUT_FAKE_SCRIPT"),
+        fake_latency=float(os.getenv("TALENTSCOUT_FAKE_LATENCY", "0"))
+    )
 
-/* Candidate Info Box */
-.candidate-info-box {
-    background-color: var(--secondary-background-color); /* Use Streamlit's theme variable for background */
-    color: var(--text-color); /* Use Streamlit's theme variable for text */
-    border: 1px solid var(--border-color); /* Use Streamlit's theme variable for border */
-    border-radius: 8px;
-    padding: 1rem;
-    margin-top: 1.5rem;
-    box-shadow: 0 1px 3px rgba(0,0,0,0.08);
-}
-.candidate-info-box h5 {
-    color: #2e72d2; /* Keep blue for heading, should be visible in both modes */
-    margin-bottom: 0.75rem;
-    font-size: 1.1rem;
-}
-.candidate-info-box p {
-    margin-bottom: 0.3rem;
-    font-size: 0.95rem;
-    color: var(--text-color); /* Use Streamlit's theme variable for text */
+LLM_TIMEOUT = 45 # Seconds allowed per model request attempt
+REQUEST_OPTIONS = {"timeout": LLM_TIMEOUT}
+
+# Seconds each call type may take, queueing included, before local content is used instead
+LLM_DEADLINES = {
+    "follow_up": 6.0,
+    "extraction": 8.0,
+    "tech_questions": 15.0,
+    "intake": 15.0,
+    "assessment": 30.0,
 }
-.candidate-info-box strong {
-    color: var(--text-color); /* Use Streamlit's theme variable for text */
+HEDGE_AFTER = 0.5 # Fraction of the deadline after which a duplicate request races the first
+
+def deadline_options(call_type):
+    """Executor options giving a call type its deadline and hedge point; misses and hedges are counted."""
+    deadline = LLM_DEADLINES.get(call_type)
+    if deadline is None:
+        return {}
+    metrics = get_metrics()
+    return {
+        "deadline": deadline,
+        "hedge_after": deadline * HEDGE_AFTER,
+        "on_hedge": lambda: metrics.count("hedged_requests", call_type=call_type),
+    }
+
+# Project quota (0 = unlimited), split evenly between the app replicas sharing it. The defaults
+# are the Gemini 1.5 Flash free tier and only apply when calls reach the real API.
+_real_api = BACKEND_MODE in ("gemini", "record")
+LLM_REPLICAS = max(1, int(os.getenv("TALENTSCOUT_REPLICAS") or get_secret("replicas") or 1))
+LLM_RPM = int(os.getenv("TALENTSCOUT_RPM") or get_secret("llm_rpm") or (15 if _real_api else 0)) / LLM_REPLICAS
+LLM_TPM = int(os.getenv("TALENTSCOUT_TPM") or get_secret("llm_tpm") or (1_000_000 if _real_api else 0)) / LLM_REPLICAS
+RESPONSE_TOKENS_ESTIMATE = 300 # Reserved per call for the response, corrected once it arrives
+SPECULATION_TOKENS_ESTIMATE = RESPONSE_TOKENS_ESTIMATE * 3 # Assessment prompt + response, before the prompt is built
+
+@st.cache_resource
+def get_scheduler():
+    """
+    One quota-aware scheduler shared by every browser session: model calls wait for an
+    RPM/TPM slot (this replica's share of the quota) in priority order (assessment and
+    first questions before follow-ups).
+    """
+    return RequestScheduler(rpm=LLM_RPM, tpm=LLM_TPM)
+
+@st.cache_resource
+def get_llm_executor():
+    """
+    One bounded worker pool shared by every browser session. Model calls run there with
+    per-call timeouts and retry/backoff on transient API errors (rate limits, 5xx), after
+    being admitted by the scheduler.
+    """
+    return LLMExecutor(timeout=LLM_TIMEOUT, scheduler=get_scheduler())
+
+@st.cache_resource
+def get_response_cache():
+    """One response cache (memory LRU + on-disk tier) shared by every browser session."""
+    return ResponseCache()
+
+# --- Metrics Setup ---
+METRICS_LOG = os.getenv("TALENTSCOUT_METRICS_LOG") # JSONL log of every span and counter, if set
+METRICS_FILE = os.getenv("TALENTSCOUT_METRICS_FILE") # Prometheus text export, rewritten after every turn, if set
+DEBUG_PANEL = str(os.getenv("TALENTSCOUT_DEBUG") or get_secret("debug_panel") or "").lower() in ("1", "true")
+
+# p95 latency targets (seconds) for a whole turn, per conversation stage
+LATENCY_SLOS = {
+    "navigation": 0.5,
+    "qa": 3.0,
+    "intake": 10.0, # Includes generating the technical questions
+    "assessment": 15.0,
 }
-</style>
-""", unsafe_allow_html=True)
 
-# --- API Setup ---
-gemini_api_key = st.secrets.get("google_gemini_api_key") or os.getenv("GOOGLE_API_KEY")
-if not gemini_api_key:
-    st.error("Gemini API Key not found. Please set it in `.streamlit/secrets.toml` or as an environment variable `GOOGLE_API_KEY`.")
-    st.stop()
+@st.cache_resource
+def get_metrics():
+    """Latency histograms and token counters shared by every browser session."""
+    return Metrics(METRICS_LOG)
+
+def token_usage(response, prompt, text):
+    """
+    {"prompt_tokens", "response_tokens"} of one model call, as the API reported them in
+    `response.usage_metadata`. Backends that report none (fake, replay) get local estimates.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and usage.prompt_token_count:
+        return {"prompt_tokens": usage.prompt_token_count, "response_tokens": usage.candidates_token_count or 0}
+    return {"prompt_tokens": estimate_tokens(prompt), "response_tokens": estimate_tokens(text)}
+
+def record_tokens(call_type, usage, charged):
+    """Counts the tokens of one model call and corrects the `charged` estimate in the TPM bucket."""
+    metrics = get_metrics()
+    metrics.count("llm_prompt_tokens", usage["prompt_tokens"], call_type=call_type)
+    metrics.count("llm_response_tokens", usage["response_tokens"], call_type=call_type)
+    get_scheduler().charge(usage["prompt_tokens"] + usage["response_tokens"] - charged)
 
-genai.configure(api_key=gemini_api_key)
-model = genai.GenerativeModel("models/gemini-1.5-flash")
+# --- Streaming Setup ---
+STREAM_RESPONSES = True # Render candidate-facing model output token-by-token as it arrives
+live_reply = None # Chat column placeholder for the reply being generated (set in the UI layout)
+
+def stream_to_reply(chunks, prefix="", format_text=None):
+    """
+    Renders streamed text chunks into the live reply placeholder and returns the full text.
+    `format_text` turns the partial raw text into what is displayed (e.g. for JSON output).
+    """
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        shown = format_text(text) if format_text else text
+        live_reply.markdown(f'<div class="message assistant">{prefix}{shown}▌</div>', unsafe_allow_html=True)
+    return text
+
+def show_queue_position(position, eta):
+    """Tells the candidate their place in the shared queue while a call waits for quota."""
+    if live_reply is not None:
+        live_reply.markdown(
+            f'<div class="message assistant">⏳ Many candidates are being screened right now. '
+            f'You are number {position} in the queue (about {max(1, round(eta))}s)...</div>',
+            unsafe_allow_html=True
+        )
+
+def cached_generate(call_type, inputs, prompt, stream_prefix=None, stream_format=None, generation_config=None):
+    """
+    Runs a helper prompt as a stateless, single-shot `generate_content` call, unless an
+    identical call (same call type, inputs, language and model) is already cached.
+    Helper prompts never enter the interview chat history, so they do not grow later
+    requests. When `stream_prefix` is given, a cache miss is streamed into the chat.
+    `generation_config` is passed through (e.g. a JSON response schema).
+    """
+    model = get_model()
+    executor = get_llm_executor()
+    admission = {
+        "priority": get_scheduler().priority(call_type),
+        "tokens": estimate_tokens(prompt) + RESPONSE_TOKENS_ESTIMATE,
+        "on_wait": show_queue_position,
+    }
+    admission.update(deadline_options(call_type))
+    options = {"request_options": REQUEST_OPTIONS}
+    if generation_config:
+        options["generation_config"] = generation_config # Only when set, so recorded fixtures keep their keys
+
+    def generate():
+        with get_metrics().span("llm_call", call_type=call_type) as attributes:
+            try:
+                if STREAM_RESPONSES and stream_prefix is not None and live_reply is not None:
+                    last_chunk = [] # The final chunk carries the usage metadata for the whole stream
+                    chunks = executor.stream(
+                        model.generate_content, prompt, stream=True, on_done=last_chunk.append, **options, **admission
+                    )
+                    text = stream_to_reply(chunks, stream_prefix, stream_format)
+                    response = last_chunk[0] if last_chunk else None
+                else:
+                    response = executor.run(lambda: model.generate_content(prompt, **options), **admission)
+                    text = response.text
+            except (LLMDeadlineError, QueueTimeoutError):
+                if "deadline" in admission: # Queueing counts against the deadline too
+                    get_metrics().count("deadline_misses", call_type=call_type)
+                raise
+            usage = token_usage(response, prompt, text)
+            attributes.update(usage)
+        record_tokens(call_type, usage, admission["tokens"])
+        return text
+
+    language = get_interview().selected_language
+    return get_response_cache().get_or_compute(call_type, inputs, language, model.model_name, generate)
 
 # --- Data Persistence Setup ---
-PERSISTENCE_FILE = "talent_scout_session.json"
+def get_interview():
+    """This session's InterviewState (see session_model.py); the one place screening state lives."""
+    return st.session_state.interview
 
-# --- Helper for Language-Specific Prompt ---
-def get_initial_system_prompt(language="English"):
+@st.cache_resource
+def get_session_store():
     """
-    Generates the initial system prompt for the Gemini model, including
-    instructions for the desired interaction language.
+    One SQLite-backed store shared by every browser session in this process. The old
+    single shared JSON state file is imported once, under a random session ID that is
+    only written to the server log.
     """
-    base_prompt = """
-You are TalentScout, an AI Hiring Assistant for tech recruitment. Your primary goal is to systematically gather essential candidate information (Full Name, Email, Phone, Years of Experience, Desired Position(s), Current Location, Tech Stack) and then generate 3-5 relevant technical questions based on their declared tech stack. Maintain a polite, professional, and helpful tone. Ensure coherent and context-aware interactions. If you don't understand an input, politely ask for clarification or guide the user back to the main purpose. You will only provide a final, concise technical assessment *after* the candidate indicates they have completed answering the questions (e.g., by saying 'done' or 'thank you'). Gracefully conclude the conversation, thanking the candidate and informing them about the next steps when they express intent to exit or the screening process is complete. Always stay on topic for hiring assistance. After the initial greeting, *explicitly request* the candidate's personal and tech stack information before proceeding with any other step. Do not generate closing remarks or assessments until all required information is gathered and technical questions are answered AND the candidate signals completion.
-"""
-    initial_history = [
-        {"role": "user", "parts": [base_prompt]},
-        {"role": "model", "parts": ["Understood. I will follow the specified process for technical screening."]}
-    ]
+    store = SessionStore()
+    try:
+        legacy_session = import_legacy_file(store)
+    except Exception as e:
+        print(f"Could not import the legacy session state, the file is left in place: {e}", file=sys.stderr)
+    else:
+        if legacy_session:
+            print(f"Imported the legacy session state; resume it with ?sid={legacy_session}", file=sys.stderr)
+    return store
 
-    # Add explicit language instruction if not English
-    if language != "English":
-        initial_history.append({"role": "user", "parts": [f"From now on, all your responses and interactions MUST be exclusively in {language}. You are forbidden from using any other language. Translate all your output into {language}."]})
-        initial_history.append({"role": "model", "parts": [f"Understood. I will now respond ONLY in {language}."]})
+@st.cache_resource
+def get_screening_index():
+    """Recruiter search index of completed screenings, shared by every browser session."""
+    return ScreeningIndex()
 
-    return initial_history
+@st.cache_resource
+def get_candidate_index():
+    """Returning-candidate lookup (email + phone -> latest session), shared by every browser session."""
+    return CandidateIndex()
+
+@st.cache_resource
+def get_question_bank():
+    """Question bank shared by every browser session; known stacks are served without the model."""
+    return QuestionBank()
+
+def get_session_id():
+    """
+    Returns this browser session's ID. It is kept in the `sid` query parameter so a
+    page reload resumes the same candidate instead of starting over.
+    """
+    if "session_id" not in st.session_state:
+        session_id = st.query_params.get("sid") or uuid.uuid4().hex
+        st.query_params["sid"] = session_id
+        st.session_state.session_id = session_id
+    return st.session_state.session_id
+
+def _mark_persisted():
+    """Records what has been written so the next save only appends the difference."""
+    interview = get_interview()
+    st.session_state._persisted = {
+        "message_count": len(interview.messages),
+        "fields": {key: json.dumps(value, sort_keys=True) for key, value in interview.field_values().items()}
+    }
 
 def save_state():
-    """Saves all relevant session state to a JSON file."""
-    state_to_save = {
-        "messages": st.session_state.messages,
-        "candidate_info": st.session_state.candidate_info,
-        "info_requested": st.session_state.info_requested,
-        "info_collected": st.session_state.info_collected,
-        "tech_questions_asked": st.session_state.tech_questions_asked,
-        "generated_tech_questions": st.session_state.generated_tech_questions,
-        "conversation_ended": st.session_state.conversation_ended,
-        "Youtube_map": st.session_state.Youtube_map, # Assuming 'Youtube_map' is intended to store Q&A
-        "current_question_idx": st.session_state.current_question_idx,
-        "awaiting_follow_up": st.session_state.awaiting_follow_up,
-        "selected_language": st.session_state.get("selected_language", "English")
+    """Appends this turn's new messages and changed state fields to the session journal."""
+    interview = get_interview()
+    persisted = st.session_state.get("_persisted", {"message_count": 0, "fields": {}})
+    new_messages = interview.messages[persisted["message_count"]:]
+
+    state_delta = {
+        key: value for key, value in interview.field_values().items()
+        if persisted["fields"].get(key) != json.dumps(value, sort_keys=True)
     }
+
     try:
-        with open(PERSISTENCE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state_to_save, f, indent=4)
+        with get_metrics().span("persist"):
+            get_session_store().append(get_session_id(), new_messages, state_delta)
+        _mark_persisted()
     except Exception as e:
         st.error(f"Error saving session state: {e}")
 
 def load_state():
-    """Loads session state from JSON file with complete initialization."""
-    if os.path.exists(PERSISTENCE_FILE):
-        try:
-            with open(PERSISTENCE_FILE, "r", encoding="utf-8") as f:
-                loaded_state = json.load(f)
-            
-            # Initialize all state variables with defaults if missing in loaded state
-            default_state = {
-                "messages": [],
-                "candidate_info": {},
-                "info_requested": False,
-                "info_collected": False,
-                "tech_questions_asked": False,
-                "generated_tech_questions": "",
-                "conversation_ended": False,
-                "Youtube_map": {},
-                "current_question_idx": 0,
-                "awaiting_follow_up": False,
-                "selected_language": "English"
-            }
-            
-            for key in default_state:
-                st.session_state[key] = loaded_state.get(key, default_state[key])
-
-            # Initialize chat session with proper history using the loaded language
-            current_language = st.session_state.get("selected_language", "English")
-            system_and_model_history = get_initial_system_prompt(current_language)
-            
-            # Reconstruct chat history from messages (excluding the initial hardcoded greeting)
-            chat_history = system_and_model_history
-            for msg in st.session_state.messages:
-                # Exclude the hardcoded welcome message from the LLM's internal history
-                if not (msg["role"] == "assistant" and msg["content"].startswith("👋 Hello! I'm **TalentScout**")):
-                    chat_history.append({
-                        "role": msg["role"],
-                        "parts": [msg["content"]]
-                    })
-            
-            st.session_state.chat_session = model.start_chat(history=chat_history)
-            
-            return True
-        except Exception as e:
-            st.warning(f"Error loading session state: {e}. Starting a new session.")
+    """Restores this session from its snapshot plus journal tail with complete initialization."""
+    try:
+        with get_metrics().span("load"):
+            loaded_state = get_session_store().load(get_session_id())
+        if loaded_state is None:
             return False
-    return False
+
+        # Fields missing from the loaded state (or from older layouts) get their defaults
+        st.session_state.interview = InterviewState.from_dict(loaded_state)
+        _mark_persisted()
+        return True
+    except Exception as e:
+        st.warning(f"Error loading session state: {e}. Starting a new session.")
+        return False
 
 # --- Helper Functions for Chat Logic ---
-def is_substantive_answer(text, min_words=15):
+def generate_follow_up(question, answer, tech_stack, fallback):
+    """
+    Generates a targeted follow-up question based on a previous answer, or returns the
+    local `fallback` follow-up if the model fails or misses its deadline.
+    """
+    current_lang = get_interview().selected_language
+    prompt = build_follow_up_prompt(question, answer, tech_stack, current_lang)
+    try:
+        response = cached_generate(
+            "follow_up",
+            {"question": question, "answer": answer, "tech_stack": tech_stack_tokens(tech_stack)},
+            prompt,
+            stream_prefix="To better understand: "
+        )
+        return f"To better understand: {response}" # Prepending with "To better understand:"
+    except Exception:
+        get_metrics().count("local_fallbacks", call_type="follow_up")
+        return f"To better understand: {fallback}"
+
+def generate_tech_questions(intake_questions=None):
+    """
+    Generates technical questions based on the candidate's tech stack. Returns a list of
+    {"question": ..., "follow_ups": [...]} dicts; the follow-ups are prepared in the same
+    call so brief answers can be followed up without another model round-trip. Stacks
+    the question bank already covers are served locally; the model is only asked about
+    technologies the bank has no questions for yet. `intake_questions` is a
+    (tokens, questions) pair the combined intake call wrote, used instead of asking the
+    model again when those are exactly the technologies it would be asked about.
+    """
+    interview = get_interview()
+    tech_stack = interview.candidate_info.get("Tech Stack", "programming")
+    current_lang = interview.selected_language
+
+    def generate(stack):
+        if intake_questions and tech_stack_tokens(stack) == intake_questions[0]:
+            return intake_questions[1]
+        response = cached_generate(
+            "tech_questions",
+            {"tech_stack": tech_stack_tokens(stack), "format": "structured"},
+            build_tech_questions_prompt(stack, current_lang),
+            stream_prefix="⏳ Preparing your technical questions...\n\n",
+            stream_format=preview_questions
+        )
+        return parse_structured_questions(response)
+
+    try:
+        return select_questions(get_question_bank(), tech_stack, current_lang, generate)
+    except Exception:
+        # Model failed or missed its deadline: bank questions plus templates for the rest of the stack
+        get_metrics().count("local_fallbacks", call_type="tech_questions")
+        try:
+            return fallback_questions(get_question_bank(), tech_stack, current_lang)
+        except Exception as e:
+            # Fallback message is in English, consider adding translations
+            st.error(f"Error generating questions: {e}")
+            return []
+
+# One structured-output call for extraction and questions when the model is needed at intake
+COMBINED_INTAKE = (os.getenv("TALENTSCOUT_COMBINED_INTAKE") or get_secret("combined_intake") or "1") != "0"
+
+def extract_with_questions(user_input, fields, tech_stack=None):
     """
-    Checks if a candidate's answer meets minimum substance requirements.
+    Extracts the candidate `fields` the local parser could not resolve and generates the
+    technical questions in the same call, with the response constrained to
+    `intake_response_schema` and strictly validated. Returns (details, questions, usable):
+    parts that fail validation come back empty so the caller can fall back for just that
+    part; `usable` is False when nothing could be read at all. `tech_stack` is what the
+    questions are written for when the stack was resolved locally.
     """
-    completion_keywords = ["done", "thank", "finished", "complete", "skip", "n/a"]
-    text_lower = text.lower().strip()
-    return (
-        len(text.split()) >= min_words and
-        not any(kw in text_lower for kw in completion_keywords)
+    interview = get_interview()
+    current_lang = interview.selected_language
+    response = cached_generate(
+        "intake",
+        {"user_input": user_input, "fields": fields, "tech_stack": tech_stack or "", "format": "structured"},
+        build_intake_prompt(user_input, fields, tech_stack, current_lang),
+        stream_prefix="⏳ Preparing your technical questions...\n\n",
+        stream_format=preview_questions,
+        generation_config={"response_mime_type": "application/json", "response_schema": intake_response_schema(fields)}
     )
+    details, questions, errors = parse_intake_response(response, fields)
+    if errors:
+        get_metrics().count("structured_output_errors", len(errors), call_type="intake")
+    questions = dedupe(questions)[:MAX_QUESTIONS]
+    if len(questions) < MIN_QUESTIONS:
+        questions = [] # Too few to run a screening on: generate them separately
+    return details, questions, bool(details or questions)
 
-def format_qa_for_assessment():
-    """Formats the collected questions and answers for the final assessment prompt."""
-    return "\n".join(
-        f"Question {i+1}: {qa['question']}\nAnswer: {' '.join(qa['answers'])}\n"
-        for i, qa in enumerate(st.session_state.Youtube_map.values())
+def assessment_fingerprint():
+    """Identity of everything the assessment depends on; cheap enough to compute every turn."""
+    interview = get_interview()
+    return json.dumps(
+        [interview.field_values()["qa_map"], interview.candidate_info.get("Tech Stack", ""), interview.selected_language],
+        sort_keys=True
     )
 
-def generate_follow_up(question, answer, tech_stack):
-    """Generates a targeted follow-up question based on a previous answer."""
-    current_lang = st.session_state.get("selected_language", "English")
-    prompt = f"""
-    Based on this technical exchange:
-    Question: "{question}"
-    Answer: "{answer}"
+def assessment_prompt(qa_map, tech_stack, language):
+    """(Q/A text, prompt) of the final assessment. Pure, so it can also run off the script thread."""
+    qa_text = screening.format_qa_for_assessment(qa_map, tech_stack)
+    return qa_text, build_assessment_prompt(tech_stack or "N/A", qa_text, language)
+
+# --- Speculative Assessment ---
+def speculate_assessment():
+    """
+    Starts the final assessment in the background as soon as every question has a complete
+    answer, so "done" usually finds it finished. The result is tied to the answers, tech
+    stack and language it was built from: if any of them changes it is stale, and is
+    replaced (or recomputed on "done").
+    """
+    interview = get_interview()
+    if not interview.questions or len(interview.qa_map) < len(interview.questions):
+        return
+    if not all(qa.complete for qa in interview.qa_map.values()):
+        return
+    fingerprint = assessment_fingerprint()
+    speculative = st.session_state.get("_speculative_assessment")
+    if speculative is not None:
+        if speculative["fingerprint"] == fingerprint:
+            return
+        speculative["cancelled"].set() # Answers changed since it started: drop it unless already sent
+        get_metrics().count("speculative_assessments", outcome="stale")
+
+    # Snapshot the inputs and resolve resources here: the background thread has no Streamlit context
+    qa_map = {i: QAEntry(qa.question, list(qa.answers), qa.complete) for i, qa in interview.qa_map.items()}
+    tech_stack, language = interview.candidate_info.get("Tech Stack", ""), interview.selected_language
+    model, metrics = get_model(), get_metrics()
 
-    Generate exactly ONE follow-up question that:
-    1. Targets the most important technical concept from the original question or answer.
-    2. Asks for specific examples or implementation details.
-    3. References these technologies if relevant: {tech_stack}
-    4. Is 1-2 sentences maximum.
-    5. MUST be exclusively in {current_lang}.
+    def generate():
+        _, prompt = assessment_prompt(qa_map, tech_stack, language) # Answer scoring happens off the turn too
+        with metrics.span("llm_call", call_type="assessment") as attributes:
+            response = model.generate_content(prompt, request_options=REQUEST_OPTIONS)
+            usage = token_usage(response, prompt, response.text)
+            attributes.update(usage)
+        return usage, response.text
 
-    Example formats:
-    - "How would you implement this using [TECH]?"
-    - "What metrics would you use to measure success?"
-    - "How would this approach scale to 1 million users?"
+    cancelled = threading.Event()
+    future = get_llm_executor().submit_background(
+        generate,
+        priority=get_scheduler().priority("speculative_assessment"), # Behind calls a candidate is waiting on
+        tokens=SPECULATION_TOKENS_ESTIMATE,
+        cancelled=cancelled
+    )
+    st.session_state._speculative_assessment = {"fingerprint": fingerprint, "future": future, "cancelled": cancelled}
+    metrics.count("speculative_assessments", outcome="started")
 
-    Make it specific and technical.
+def take_speculative_assessment():
     """
-    try:
-        response = st.session_state.chat_session.send_message(prompt).text
-        return f"To better understand: {response}" # Prepending with "To better understand:"
-    except Exception as e:
-        # Fallback message is in English, consider adding translations for these static messages
-        return "Could you elaborate on your last point?"
-
-def validate_candidate_info(info):
-    """
-    Validates extracted candidate information (email format, phone, years of experience).
-    Returns if all required fields are present, a list of missing fields, and invalid fields.
-    """
-    required_fields = ["Full Name", "Email Address", "Tech Stack"]
-    all_present = True
-    missing_fields = []
-    invalid_fields = []
-
-    # Check required fields
-    for field in required_fields:
-        value = info.get(field, "").strip()
-        if not value or value.lower() == "n/a":
-            all_present = False
-            missing_fields.append(field)
-
-    # Validate email format
-    email = info.get("Email Address", "")
-    if email and email.lower() != "n/a":
-        if not re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", email):
-            invalid_fields.append("Email Address (invalid format)")
-
-    # Validate phone number
-    phone = info.get("Phone Number", "")
-    if phone and phone.lower() != "n/a":
-        if not re.match(r"^\+?[\d\s\-()]+$", phone): # Allows digits, spaces, hyphens, parentheses
-            invalid_fields.append("Phone Number (invalid format)")
-
-    # Validate years of experience
-    years_exp = info.get("Years of Experience", "")
-    if years_exp and years_exp.lower() != "n/a":
-        try:
-            exp = float(years_exp)
-            if not (0 <= exp <= 50): # Assuming a reasonable range for experience
-                invalid_fields.append("Years of Experience (unrealistic value)")
-        except ValueError:
-            invalid_fields.append("Years of Experience (not a number)")
-
-    return all_present, missing_fields, invalid_fields
-
-def generate_tech_questions():
-    """Generates technical questions based on the candidate's tech stack."""
-    tech_stack = st.session_state.candidate_info.get("Tech Stack", "programming")
-    current_lang = st.session_state.get("selected_language", "English")
-
-    prompt = f"""
-    Generate 3-5 technical questions for a candidate with this tech stack: {tech_stack}
-    Requirements:
-    - Each question should test practical, hands-on knowledge.
-    - Include at least one question about system design.
-    - Include at least one question about debugging/optimization.
-    - Questions should require detailed explanations, not just yes/no answers.
-    - Format as a numbered list.
-    - Avoid generic "what is" questions.
-    - All questions MUST be exclusively in {current_lang}.
+    The background assessment for the current answers, waiting for it if still running; None
+    if there is none or it failed. Raises LLMDeadlineError if it is not ready by the deadline.
     """
+    speculative = st.session_state.get("_speculative_assessment")
+    if speculative is None or speculative["fingerprint"] != assessment_fingerprint():
+        return None
+    future = speculative["future"]
+    if not future.done() and live_reply is not None:
+        live_reply.markdown('<div class="message assistant">🎯 Finishing your assessment...</div>', unsafe_allow_html=True)
+    try:
+        usage, assessment = future.result(timeout=LLM_DEADLINES["assessment"])
+    except FutureTimeoutError:
+        # Still queued or running: keep it for the next "done" rather than starting a second one
+        get_metrics().count("deadline_misses", call_type="assessment")
+        raise LLMDeadlineError("Speculative assessment is still running") from None
+    except Exception:
+        del st.session_state._speculative_assessment # Failed: generate it the regular way
+        get_metrics().count("speculative_assessments", outcome="failed")
+        return None
+    if not speculative.get("used"):
+        speculative["used"] = True
+        record_tokens("assessment", usage, SPECULATION_TOKENS_ESTIMATE)
+        get_metrics().count("speculative_assessments", outcome="used")
+    return assessment
+
+def generate_assessment():
+    """Generates the final technical assessment based on collected answers (or uses the speculative one)."""
+    interview = get_interview()
     try:
-        response = st.session_state.chat_session.send_message(prompt).text
-        # Ensure questions are parsed correctly from the numbered list format
-        return [q.strip() for q in response.split('\n') if q.strip() and re.match(r'^\d+\.', q.strip())]
+        name = first_name(interview.candidate_info)
+        assessment = take_speculative_assessment()
+        if assessment is None:
+            qa_text, prompt = assessment_prompt(
+                interview.qa_map, interview.candidate_info.get("Tech Stack", ""), interview.selected_language
+            )
+            assessment = cached_generate(
+                "assessment",
+                {"qa": qa_text},
+                prompt,
+                stream_prefix=f"🎯 Technical Assessment for {name}:\n"
+            )
+    except QueueTimeoutError:
+        # Fallback message is in English, consider adding translations
+        return "We're screening many candidates right now. Please say 'done' again in a minute for your assessment."
+    except LLMDeadlineError:
+        speculate_assessment() # Keep working on it in the background for the next "done"
+        # Fallback message is in English, consider adding translations
+        return "Your assessment is taking longer than expected. Please say 'done' again in a moment."
     except Exception as e:
         # Fallback message is in English, consider adding translations
-        st.error(f"Error generating questions: {e}")
-        return []
+        return f"Error generating assessment: {e}"
 
-def generate_assessment():
-    """Generates the final technical assessment based on collected answers."""
-    current_lang = st.session_state.get("selected_language", "English")
-    assessment_prompt = f"""
-    Candidate Tech Stack: {st.session_state.candidate_info.get("Tech Stack", "N/A")}
-    
-    Questions and Answers:
-    {format_qa_for_assessment()}
-    
-    Provide a concise technical assessment (3-4 sentences) that:
-    1. Highlights 2 specific strengths demonstrated in the answers.
-    2. Identifies 2 concrete areas for improvement.
-    3. Assesses overall technical competency (1-5 scale).
-    4. Avoids generic statements - be specific to the answers given and Note the overall tone or confidence conveyed in their responses.
-    5. Does not make hiring recommendations.
-    6. All output MUST be exclusively in {current_lang}.
+    try:
+        # The screening is complete: make it searchable for recruiters
+        get_screening_index().add(get_session_id(), interview.candidate_info, assessment)
+    except Exception as e:
+        st.warning(f"Could not index this screening: {e}")
+    register_candidate() # And the one this candidate is offered when they come back
+    return ASSESSMENT_TEMPLATE.format(name=name, assessment=assessment)
+
+# --- Returning Candidates ---
+# Whole words only, so "renew" is not "new"; a reply matching several choices (or negating one) is asked again
+RESUME_KEYWORDS = {"resume", "continue"}
+REUSE_KEYWORDS = {"reuse", "same"}
+NEW_KEYWORDS = {"new", "fresh", "restart"}
+NEGATIONS = {"no", "not", "don't", "dont", "never"}
+CHOICE_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+def resume_code_notice():
+    """
+    Gives this screening a resume code (once) and returns the sentence showing it. Anyone
+    can type a candidate's email and phone, so resuming their answers also takes this code.
     """
+    interview = get_interview()
+    if not interview.resume_code:
+        interview.resume_code = secrets.token_hex(4)
+    # This message is static, consider adding translations for it.
+    return f"Your resume code is **{interview.resume_code}**; keep it to resume this screening later."
+
+def find_previous_session(info):
+    """(session ID, InterviewState) of this candidate's latest earlier session, or None if they are new."""
+    key = candidate_key(info)
+    if key is None:
+        return None
     try:
-        assessment = st.session_state.chat_session.send_message(assessment_prompt).text
-        name = st.session_state.candidate_info.get("Full Name", "Candidate").split()[0]
-        
-        # This concluding message is static, consider adding translations for it.
-        return f"""
-🎯 Technical Assessment for {name}:
-{assessment}
+        session_id = get_candidate_index().lookup(key, exclude_session=get_session_id())
+        state = get_session_store().load(session_id) if session_id else None
+    except Exception as e:
+        st.warning(f"Could not look up previous screenings: {e}")
+        return None
+    return (session_id, InterviewState.from_dict(state)) if state else None
 
-Thank you for your time! We'll be in touch within 5-7 business days.
-"""
+def register_candidate():
+    """Makes this session the one a returning candidate with the same email and phone is offered."""
+    key = candidate_key(get_interview().candidate_info)
+    if key is None:
+        return
+    try:
+        get_candidate_index().register(key, get_session_id())
     except Exception as e:
-        # Fallback message is in English, consider adding translations
-        return f"Error generating assessment: {e}"
+        st.warning(f"Could not register this candidate: {e}")
+
+def ask_tech_questions(name, intake_questions=None):
+    """
+    Asks the first technical question. The questions come from the bank where it covers the
+    tech stack, and `intake_questions` (see `generate_tech_questions`) fill the rest.
+    """
+    interview = get_interview()
+    structured_questions = generate_tech_questions(intake_questions)
+    questions = [f"{i+1}. {q['question']}" for i, q in enumerate(structured_questions)]
+    if questions:
+        interview.questions = questions
+        interview.prepared_follow_ups = [q["follow_ups"] for q in structured_questions]
+        interview.tech_questions_asked = True
+        # This message is static, consider adding translations for it.
+        return f"✅ Thanks {name}! {resume_code_notice()}\n\nFirst question:\n\n{questions[0]}"
+    else:
+        # This message is static, consider adding translations for it.
+        return "Error generating questions. Please try again."
+
+def handle_returning_choice(choice):
+    """
+    Answers the resume/reuse/new offer made to a returning candidate. Resuming carries over
+    their questions and answers, reusing only the questions; both skip question generation.
+    Anyone can type a candidate's email and phone, so both need the previous session's resume
+    code before anything from it is used, and only then does this session replace it in the
+    candidate index. New questions are registered when the screening completes.
+    """
+    interview = get_interview()
+    name = first_name(interview.candidate_info)
+    words = set(CHOICE_WORD_PATTERN.findall(choice))
+    resume = bool(words & RESUME_KEYWORDS) # Resume wins over reuse: it also reuses the questions
+    reuse = bool(words & REUSE_KEYWORDS) and not resume
+    new = bool(words & NEW_KEYWORDS)
+    if resume + reuse + new != 1 or words & NEGATIONS:
+        # This message is static, consider adding translations for it.
+        return "Please reply **resume** or **reuse** followed by your resume code, or **new**."
+
+    previous = None
+    if resume or reuse:
+        try:
+            state = get_session_store().load(interview.previous_session)
+            previous = InterviewState.from_dict(state) if state else None
+        except Exception as e:
+            st.warning(f"Could not load your previous screening: {e}")
+    if previous is not None and not (
+        previous.resume_code and any(hmac.compare_digest(word, previous.resume_code) for word in words)
+    ):
+        get_metrics().count("returning_candidates", choice="code_denied")
+        # This message is static, consider adding translations for it.
+        return ("That resume code does not match your previous screening. Reply **resume** or **reuse** "
+                "followed by the code you were given, or **new** for new questions.")
+    if previous is None or not previous.questions:
+        get_metrics().count("returning_candidates", choice="new")
+        return ask_tech_questions(name)
+
+    register_candidate() # The code proves it is them: this session is now their latest
+    interview.questions = list(previous.questions)
+    interview.prepared_follow_ups = previous.prepared_follow_ups
+    interview.tech_questions_asked = True
+    if not resume:
+        get_metrics().count("returning_candidates", choice="reuse")
+        # This message is static, consider adding translations for it.
+        return (f"✅ Here are your previous questions again, {name}. {resume_code_notice()}\n\n"
+                f"First question:\n\n{interview.questions[0]}")
+
+    get_metrics().count("returning_candidates", choice="resume")
+    interview.qa_map = previous.qa_map
+    interview.current_question_idx = next(
+        (i for i in range(len(interview.questions)) if not (i in interview.qa_map and interview.qa_map[i].complete)),
+        len(interview.questions)
+    )
+    speculate_assessment()
+    if interview.current_question_idx < len(interview.questions):
+        # This message is static, consider adding translations for it.
+        return (f"✅ Welcome back {name}! {resume_code_notice()}\n\n"
+                f"Picking up where you left off:\n\n{interview.questions[interview.current_question_idx]}")
+    # This message is static, consider adding translations for it.
+    return f"✅ Welcome back {name}! {resume_code_notice()} All your previous answers are in. Say 'done' for your assessment."
 
 # --- Session Initialization ---
 # This block handles initial setup or loading of state from persistence file
-if "messages" not in st.session_state:
+if "interview" not in st.session_state:
     if not load_state():
-        # Initialize all state variables if no saved state found or load failed
-        st.session_state.messages = []
-        st.session_state.candidate_info = {}
-        st.session_state.info_requested = False
-        st.session_state.info_collected = False
-        st.session_state.tech_questions_asked = False
-        st.session_state.generated_tech_questions = ""
-        st.session_state.conversation_ended = False
-        st.session_state.Youtube_map = {} # Used to store question-answer pairs
-        st.session_state.current_question_idx = 0
-        st.session_state.awaiting_follow_up = False
-        st.session_state.selected_language = "English" # Default language on fresh start
-
-        # Start chat session with the dynamic initial prompt
-        initial_history_for_chat = get_initial_system_prompt(st.session_state.selected_language)
-        st.session_state.chat_session = model.start_chat(history=initial_history_for_chat)
+        # Start from a fresh state if no saved state found or load failed
+        st.session_state.interview = InterviewState()
+        interview = get_interview()
 
         # Initial assistant message for the user (hardcoded, not translated by LLM)
         welcome_msg = """👋 Hello! I'm **TalentScout**, your AI hiring assistant. To begin your quick technical screening, please provide the following details:
@@ -425,67 +689,76 @@ if "messages" not in st.session_state:
 - **Your Tech Stack**
 
 Once I have this, I'll generate a few technical questions for you. 🚀"""
-        st.session_state.messages.append({"role": "assistant", "content": welcome_msg})
-        st.session_state.info_requested = True
+        interview.messages.append({"role": "assistant", "content": welcome_msg})
+        interview.info_requested = True
         save_state()
 
-# Fallback: Ensure chat_session exists even if loading failed or if it somehow disappeared during a rerun
-if "chat_session" not in st.session_state:
-    current_lang = st.session_state.get("selected_language", "English")
-    fallback_history = get_initial_system_prompt(current_lang)
-
-    chat_history_for_new_session = []
-    for msg in st.session_state.messages:
-        # Exclude the hardcoded welcome message from the LLM's history
-        if not (msg["role"] == "assistant" and msg["content"].startswith("👋 Hello! I'm **TalentScout**")):
-            chat_history_for_new_session.append({"role": msg["role"], "parts": [msg["content"]]})
 
-    # Start the chat session with the dynamic system prompt and existing conversation
-    st.session_state.chat_session = model.start_chat(history=fallback_history + chat_history_for_new_session)
+# --- Main Chat Logic (`handle_user_input` function definition) ---
+COMPLETION_KEYWORDS = ["thank", "done", "finished", "that's all", "no more", "complete", "bye"]
+NAVIGATION_KEYWORDS = ["next", "skip", "back"]
 
+def turn_stage(user_input):
+    """The conversation stage `handle_user_input` will treat this input as (used to label metrics)."""
+    interview = get_interview()
+    user_input_lower = user_input.lower().strip()
+    if interview.previous_session and not interview.tech_questions_asked:
+        return "intake" # Answering the returning-candidate offer
+    if user_input_lower in NAVIGATION_KEYWORDS:
+        return "navigation"
+    if any(kw in user_input_lower for kw in COMPLETION_KEYWORDS):
+        return "assessment"
+    if interview.tech_questions_asked and not interview.conversation_ended:
+        return "qa"
+    if not interview.info_collected:
+        return "intake"
+    return "other" # Off-script input after the questions
 
-# --- Main Chat Logic (`handle_user_input` function definition) ---
 def handle_user_input(user_input):
     """
     Processes user input based on the current stage of the conversation.
     Handles navigation, info collection, technical Q&A, and conversation completion.
     """
-    completion_keywords = ["thank", "done", "finished", "that's all", "no more", "complete", "bye"]
-    navigation_keywords = ["next", "skip", "back"]
     user_input_lower = user_input.lower().strip()
+    interview = get_interview()
     
+    # Handle a returning candidate's choice between their previous screening and a new one
+    if interview.previous_session and not interview.tech_questions_asked:
+        return handle_returning_choice(user_input_lower)
+
     # Handle navigation commands
-    if user_input_lower in navigation_keywords:
+    elif user_input_lower in NAVIGATION_KEYWORDS:
         if user_input_lower == "back":
-            st.session_state.current_question_idx = max(0, st.session_state.current_question_idx - 1)
+            interview.current_question_idx = max(0, interview.current_question_idx - 1)
         else: # "next" or "skip"
-            st.session_state.current_question_idx += 1
+            interview.current_question_idx += 1
         
-        questions = [q for q in st.session_state.generated_tech_questions.split('\n') if q.strip()]
-        if st.session_state.current_question_idx < len(questions):
-            return questions[st.session_state.current_question_idx]
+        questions = interview.questions
+        if interview.current_question_idx < len(questions):
+            return questions[interview.current_question_idx]
         else:
             # This message is static, consider adding translations for it.
             return "You've completed all questions. Say 'done' for your assessment."
     
     # Handle completion request
-    elif any(kw in user_input_lower for kw in completion_keywords):
-        if not st.session_state.Youtube_map:
+    elif any(kw in user_input_lower for kw in COMPLETION_KEYWORDS):
+        if not interview.qa_map:
             # This message is static, consider adding translations for it.
             return "Please answer at least one question completely before saying 'done'."
         
         # Check if all answered questions have substantive answers before assessment
-        for q_idx, qa in st.session_state.Youtube_map.items():
-            if not any(is_substantive_answer(ans) for ans in qa["answers"]):
+        tech_stack = interview.candidate_info.get("Tech Stack", "")
+        for q_idx, qa in interview.qa_map.items():
+            if not any(is_substantive_answer(ans, qa.question, tech_stack) for ans in qa.answers):
                 # This message is static, consider adding translations for it.
                 return f"Question {q_idx+1} needs a more detailed answer before completing."
         
         return generate_assessment() # Generate the final assessment
     
     # Handle technical Q&A phase
-    elif st.session_state.tech_questions_asked and not st.session_state.conversation_ended:
-        questions = [q for q in st.session_state.generated_tech_questions.split('\n') if q.strip()]
-        current_q_idx = st.session_state.current_question_idx
+    elif interview.tech_questions_asked and not interview.conversation_ended:
+        questions = interview.questions
+        current_q_idx = interview.current_question_idx
         
         # Ensure we don't go out of bounds if questions were skipped or if model generated fewer
         if current_q_idx >= len(questions):
@@ -495,87 +768,122 @@ def handle_user_input(user_input):
         current_question = questions[current_q_idx]
         
         # Initialize question in answer map if not present
-        if current_q_idx not in st.session_state.Youtube_map:
-            st.session_state.Youtube_map[current_q_idx] = {
-                "question": current_question,
-                "answers": [],
-                "complete": False
-            }
+        if current_q_idx not in interview.qa_map:
+            interview.qa_map[current_q_idx] = QAEntry(question=current_question)
         
         # Record current user's answer
-        st.session_state.Youtube_map[current_q_idx]["answers"].append(user_input)
+        interview.qa_map[current_q_idx].answers.append(user_input)
         
-        # Check if answer is substantive
-        if is_substantive_answer(user_input):
-            st.session_state.Youtube_map[current_q_idx]["complete"] = True
-            st.session_state.current_question_idx += 1 # Move to next question
+        # Check if answer is substantive (scored locally, no model call)
+        if is_substantive_answer(user_input, current_question, interview.candidate_info.get("Tech Stack", "")):
+            interview.qa_map[current_q_idx].complete = True
+            interview.current_question_idx += 1 # Move to next question
+            speculate_assessment() # Once every question is answered, start the assessment before "done"
             
-            if st.session_state.current_question_idx < len(questions):
-                return questions[st.session_state.current_question_idx] # Return next question
+            if interview.current_question_idx < len(questions):
+                return questions[interview.current_question_idx] # Return next question
             else:
                 # This message is static, consider adding translations for it.
                 return "You've answered all questions. Say 'done' for your assessment."
         else:
-            # Generate follow-up if answer is insufficient
-            tech_stack = st.session_state.candidate_info.get("Tech Stack", "")
-            return generate_follow_up(current_question, user_input, tech_stack)
+            # Serve a follow-up prepared with the question unless the answer went somewhere unanticipated
+            prepared = interview.prepared_follow_ups
+            follow_ups = prepared[current_q_idx] if current_q_idx < len(prepared) else []
+            asked = len(interview.qa_map[current_q_idx].answers) - 1 # Follow-ups already asked
+            if asked < len(follow_ups) and not answer_diverges(current_question, follow_ups, user_input):
+                return f"To better understand: {follow_ups[asked]}"
+
+            # Generate follow-up if answer is insufficient (falling back to a prepared or canned one)
+            tech_stack = interview.candidate_info.get("Tech Stack", "")
+            fallback = follow_ups[asked] if asked < len(follow_ups) else screening.canned_follow_up(asked)
+            return generate_follow_up(current_question, user_input, tech_stack, fallback)
     
     # Handle info collection phase (initial phase)
-    elif not st.session_state.info_collected:
-        current_lang = st.session_state.get("selected_language", "English")
-        extraction_prompt = f"""
-        Extract the following from: {user_input}
-        Provide as JSON with these fields (use "N/A" if unknown):
-        {{
-            "Full Name": "...",
-            "Email Address": "...",
-            "Phone Number": "...",
-            "Years of Experience": "...",
-            "Desired Position(s)": "...",
-            "Current Location": "...",
-            "Tech Stack": "..."
-        }}
-        
-        All responses, including confirmations or requests for clarification, MUST be exclusively in {current_lang}.
-        """
+    elif not interview.info_collected:
+        # Fast path: resolve labelled fields and email/phone/experience locally
+        parsed_info = extract_candidate_info(user_input)
+        intake_questions = None
         try:
-            raw_response = st.session_state.chat_session.send_message(extraction_prompt).text
-            json_match = re.search(r"```json\n(.*?)```", raw_response, re.DOTALL)
-            
-            if json_match:
-                parsed_info = json.loads(json_match.group(1))
-                st.session_state.candidate_info.update(parsed_info)
-                
-                # Validate extracted info
-                all_present, missing, invalid = validate_candidate_info(parsed_info)
-                
-                if all_present and not invalid:
-                    st.session_state.info_collected = True
-                    name = st.session_state.candidate_info.get("Full Name", "Candidate").split()[0]
-                    
-                    # Generate technical questions
-                    questions = generate_tech_questions()
-                    if questions:
-                        st.session_state.generated_tech_questions = "\n".join(questions)
-                        st.session_state.tech_questions_asked = True
-                        # This message is static, consider adding translations for it.
-                        return f"✅ Thanks {name}! First question:\n\n{questions[0]}"
-                    else:
-                        # This message is static, consider adding translations for it.
-                        return "Error generating questions. Please try again."
-                else:
-                    # These feedback messages are static, consider adding translations for them.
-                    feedback = ["Please provide:"]
-                    if missing:
-                        feedback.append(f"Missing: {', '.join(missing)}")
-                    if invalid:
-                        feedback.append(f"Invalid: {', '.join(invalid)}")
-                    feedback.append("\nExample format: Full Name: John Doe, Email: john@example.com, Tech Stack: Python, SQL")
-                    return "\n".join(feedback)
+            # Only ask the model when a required field could not be resolved locally,
+            # and then only for the fields that are still unknown
+            needs_model = any(field not in parsed_info for field in REQUIRED_FIELDS)
+            # A stack resolved locally is looked up in the bank first: the intake call then writes
+            # questions only for what it does not cover, and none at all when it covers everything
+            question_tokens = None
+            if needs_model and COMBINED_INTAKE and parsed_info.get("Tech Stack"):
+                try:
+                    question_tokens = tokens_to_generate(
+                        get_question_bank(), parsed_info["Tech Stack"], interview.selected_language
+                    )
+                except Exception as e:
+                    st.warning(f"Could not search the question bank: {e}")
+
+            if needs_model and COMBINED_INTAKE and question_tokens != []:
+                unresolved_fields = [field for field in CANDIDATE_FIELDS if field not in parsed_info]
+                model_info, questions, usable = extract_with_questions(
+                    user_input, unresolved_fields, ", ".join(question_tokens) if question_tokens else None
+                )
+                if not usable:
+                    # This message is static, consider adding translations for it.
+                    return "I couldn't extract the information. Please provide details in this format:\nFull Name: John Doe, Email: john@example.com, Tech Stack: Python, SQL"
+                parsed_info.update(model_info)
+                if questions:
+                    intake_questions = (question_tokens or tech_stack_tokens(parsed_info.get("Tech Stack", "")), questions)
+            elif needs_model:
+                current_lang = interview.selected_language
+                unresolved_fields = [field for field in CANDIDATE_FIELDS if field not in parsed_info]
+                extraction_prompt = build_extraction_prompt(user_input, unresolved_fields, current_lang)
+                raw_response = cached_generate(
+                    "extraction", {"user_input": user_input, "fields": unresolved_fields}, extraction_prompt
+                )
+                model_info = parse_extraction_response(raw_response)
+                if model_info is None:
+                    # This message is static, consider adding translations for it.
+                    return "I couldn't extract the information. Please provide details in this format:\nFull Name: John Doe, Email: john@example.com, Tech Stack: Python, SQL"
+                parsed_info.update({field: model_info[field] for field in unresolved_fields if field in model_info})
+
+            for field in CANDIDATE_FIELDS:
+                parsed_info.setdefault(field, "N/A")
+            interview.candidate_info.update(parsed_info)
+
+            # Validate extracted info
+            all_present, missing, invalid = validate_candidate_info(parsed_info)
+
+            if all_present and not invalid:
+                interview.info_collected = True
+                name = first_name(interview.candidate_info)
+
+                # Offer a returning candidate their previous questions instead of generating new ones.
+                # Nothing from that session is shown, and it stays registered, until the code is given.
+                previous = find_previous_session(interview.candidate_info)
+                if previous and previous[1].questions:
+                    interview.previous_session = previous[0]
+                    # This message is static, consider adding translations for it.
+                    return (
+                        f"✅ Welcome back {name}! You have screened with us before. Reply **resume** followed by "
+                        "the resume code you were given to continue where you left off, **reuse** followed by the "
+                        "code to answer the same questions again, or **new** for new questions."
+                    )
+
+                if previous is None:
+                    register_candidate() # Nobody to overwrite
+                # Bank questions first, then those from the intake call or a new model call
+                return ask_tech_questions(name, intake_questions)
             else:
-                # This message is static, consider adding translations for it.
-                return "I couldn't extract the information. Please provide details in this format:\nFull Name: John Doe, Email: john@example.com, Tech Stack: Python, SQL"
-        
+                # These feedback messages are static, consider adding translations for them.
+                feedback = ["Please provide:"]
+                if missing:
+                    feedback.append(f"Missing: {', '.join(missing)}")
+                if invalid:
+                    feedback.append(f"Invalid: {', '.join(invalid)}")
+                feedback.append("\nExample format: Full Name: John Doe, Email: john@example.com, Tech Stack: Python, SQL")
+                return "\n".join(feedback)
+
+        except (LLMTimeoutError, QueueTimeoutError):
+            # The model is too slow right now: ask for the labelled format the local parser reads
+            get_metrics().count("local_fallbacks", call_type="intake")
+            # This message is static, consider adding translations for it.
+            return "Sorry, that took too long. Please send your details in this format so I can read them right away:\nFull Name: John Doe, Email: john@example.com, Tech Stack: Python, SQL"
         except Exception as e:
             # This message is static, consider adding translations for it.
             return f"Error processing your information: {e}"
@@ -584,30 +892,84 @@ def handle_user_input(user_input):
     # This message is static, consider adding translations for it.
     return "I'm not sure how to proceed. Please provide the requested information or answer the current question."
 
+# --- Debug Panel ---
+@st.fragment
+def debug_panel():
+    """Per-stage turn latency against its SLO, model call/persistence timings, tokens and cache stats."""
+    with st.expander("⏱️ Performance (debug)", expanded=False):
+        st.button("↻ Refresh", key="refresh_metrics") # Any interaction reruns just this fragment
+        metrics = get_metrics()
+        summary = metrics.summary()
+
+        turns = {row["labels"].get("stage"): row for row in summary if row["metric"] == "turn"}
+        st.markdown("**Turn latency by stage**")
+        st.dataframe([
+            {
+                "stage": stage,
+                "turns": turns[stage]["count"] if stage in turns else 0,
+                "p50 s": round(turns[stage]["p50"], 3) if stage in turns else None,
+                "p95 s": round(turns[stage]["p95"], 3) if stage in turns else None,
+                "SLO s": slo,
+                "ok": "✅" if stage not in turns or turns[stage]["p95"] <= slo else "⚠️",
+            }
+            for stage, slo in LATENCY_SLOS.items()
+        ], hide_index=True)
+
+        st.markdown("**Spans**")
+        st.dataframe([
+            {
+                "span": row["metric"] + "".join(f" {v}" for v in row["labels"].values()),
+                "count": row["count"],
+                "p50 s": round(row["p50"], 3),
+                "p95 s": round(row["p95"], 3),
+                "max s": round(row["max"], 3),
+            }
+            for row in summary if row["metric"] != "turn"
+        ], hide_index=True)
+
+        tokens = {}
+        for (name, labels), value in metrics.counter_values().items():
+            tokens.setdefault(dict(labels).get("call_type", ""), {})[name.replace("llm_", "")] = int(value)
+        st.markdown("**Tokens (estimated)**")
+        st.dataframe([{"call type": call_type, **counts} for call_type, counts in sorted(tokens.items())], hide_index=True)
+
+        st.caption(f"Cache: {get_response_cache().stats()}")
+        st.caption(f"Executor: {get_llm_executor().counters}")
+        scheduler = get_scheduler()
+        st.caption(f"Scheduler (RPM {LLM_RPM or '∞'}, TPM {LLM_TPM or '∞'}): queue={scheduler.queue_length()} {scheduler.counters}")
+
 # --- UI Layout ---
 # Using columns for sidebar and main chat area
 col1, col2 = st.columns([1.2, 3])
+interview = get_interview()
 
 with col1: # Sidebar column
-    st.image("images.png", use_container_width=True, caption="TalentScout Logo")
+    st.image(get_logo(), use_container_width=True, caption="TalentScout Logo")
     st.markdown('<div class="sidebar-title">About TalentScout</div>', unsafe_allow_html=True)
     st.markdown('<div class="sidebar-desc">Your intelligent recruitment partner for tech talent.</div>', unsafe_allow_html=True)
 
     # Reset Chat button
     if st.button("🔄 Reset Chat", key="reset"):
-        for key in list(st.session_state.keys()):
-            del st.session_state[key] # Clear all session state variables
-        if os.path.exists(PERSISTENCE_FILE):
-            os.remove(PERSISTENCE_FILE) # Delete persistence file
+        try:
+            # Each delete rolls back on failure, and the session is kept until all of them succeed
+            get_session_store().delete(get_session_id()) # Delete this session's saved data
+            get_screening_index().remove(get_session_id()) # Not found by recruiter searches any more
+            get_candidate_index().forget(get_session_id()) # Not offered to a returning candidate any more
+        except Exception as e:
+            st.error(f"Could not delete the saved data, please try again: {e}")
+        else:
+            for key in list(st.session_state.keys()):
+                del st.session_state[key] # Clear all session state variables
+            st.query_params.clear() # Start over under a fresh session ID
             st.toast("Session and saved data reset!") # User feedback
-        st.rerun() # Rerun app to reset UI
+            st.rerun() # Rerun app to reset UI
 
     st.markdown("---") # Visual divider
 
     # --- Language Selector Logic ---
     # Store the previous language to detect a change
     if "prev_selected_language" not in st.session_state:
-        st.session_state.prev_selected_language = st.session_state.get("selected_language", "English")
+        st.session_state.prev_selected_language = interview.selected_language
 
     selected_language_from_ui = st.selectbox(
         "Select Interface Language:",
@@ -615,75 +977,117 @@ with col1: # Sidebar column
         key="language_selector",
         # Set the default value to the current selected_language from session_state
         # This prevents the dropdown from resetting to "English" on every rerun if a different language was loaded
-        index=("English", "Spanish", "French", "German", "Japanese", "Hindi").index(st.session_state.get("selected_language", "English"))
+        index=("English", "Spanish", "French", "German", "Japanese", "Hindi").index(interview.selected_language)
     )
 
     # Update session state with the new selection
-    st.session_state.selected_language = selected_language_from_ui
+    interview.selected_language = selected_language_from_ui
 
-    # Crucial Logic: Re-initialize chat session if language changes
-    if st.session_state.selected_language != st.session_state.prev_selected_language:
-        st.session_state.prev_selected_language = st.session_state.selected_language # Update previous state for next rerun
-        
-        # Re-initialize the chat session with the new language prompt.
-        # This tells the LLM to start responding in the new language from now on.
-        new_system_history = get_initial_system_prompt(st.session_state.selected_language)
+    # Announce a language change in the chat
+    if interview.selected_language != st.session_state.prev_selected_language:
+        st.session_state.prev_selected_language = interview.selected_language # Update previous state for next rerun
         
-        # Preserve existing user/assistant messages but restart the chat session with the new system prompt
-        current_chat_history_for_reinit = []
-        for msg in st.session_state.messages:
-            # Exclude the initial hardcoded welcome message from the LLM's history to avoid duplicates
-            if not (msg["role"] == "assistant" and msg["content"].startswith("👋 Hello! I'm **TalentScout**")):
-                current_chat_history_for_reinit.append({"role": msg["role"], "parts": [msg["content"]]})
-        
-        st.session_state.chat_session = model.start_chat(history=new_system_history + current_chat_history_for_reinit)
+        # Every prompt is built with the selected language, so it applies from the next model call.
+        # Existing user/assistant messages are preserved.
         
         # Add a message to the chat confirming the language change (optional but good UX)
-        language_change_msg = f"Language changed to **{st.session_state.selected_language}**. Please continue the conversation. New responses will be in this language."
-        st.session_state.messages.append({"role": "assistant", "content": language_change_msg})
-        st.toast(f"Language set to {st.session_state.selected_language}!")
+        language_change_msg = f"Language changed to **{interview.selected_language}**. Please continue the conversation. New responses will be in this language."
+        interview.messages.append({"role": "assistant", "content": language_change_msg})
+        st.toast(f"Language set to {interview.selected_language}!")
         st.rerun() # Rerun the app to reflect the change immediately
 
+    if DEBUG_PANEL:
+        debug_panel()
+
     # Display collected candidate details if available
-    if st.session_state.info_collected and st.session_state.candidate_info:
+    if interview.info_collected and interview.candidate_info:
         with st.expander("📝 Candidate Details", expanded=True):
             st.markdown('<div class="candidate-info-box">', unsafe_allow_html=True)
             st.markdown('<h5>Collected Information</h5>', unsafe_allow_html=True)
-            for key, value in st.session_state.candidate_info.items():
+            for key, value in interview.candidate_info.items():
                 if value and str(value).strip().lower() != "n/a":
                     st.markdown(f'<p><strong>{key}:</strong> {value}</p>', unsafe_allow_html=True)
             st.markdown('</div>', unsafe_allow_html=True)
 
-with col2: # Main chat column
-    st.markdown("## TalentScout")
-    st.markdown("### AI Hiring Assistant")
+TRANSCRIPT_PAGE_SIZE = 20 # Messages rendered per page of the chat transcript
 
-    # Display chat messages in the main chat area
-    for msg in st.session_state.messages:
-        role_class = "assistant" if msg["role"] == "assistant" else "user"
-        st.markdown(
-            f'<div class="message {role_class}">{msg["content"]}</div>',
-            unsafe_allow_html=True
-        )
+def render_message(msg):
+    """Renders one transcript message as a styled chat bubble."""
+    role_class = "assistant" if msg["role"] == "assistant" else "user"
+    st.markdown(
+        f'<div class="message {role_class}">{msg["content"]}</div>',
+        unsafe_allow_html=True
+    )
+
+def rerun_chat_area():
+    """Reruns only the chat fragment when it is running as one, otherwise the whole app."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException: # Fragment scope is unavailable during full-app runs
+        st.rerun()
+
+@st.fragment
+def chat_area():
+    """
+    Transcript and input form. This runs as a fragment, so sending a message reruns only
+    this area (not the sidebar or the stylesheet), and only the latest page of the
+    transcript is rendered; earlier messages are loaded on demand.
+    """
+    global live_message, live_reply
+    interview = get_interview()
+
+    # Display the latest page of chat messages, with older ones behind a button
+    messages = interview.messages
+    window = st.session_state.get("transcript_window", TRANSCRIPT_PAGE_SIZE)
+    hidden = max(0, len(messages) - window)
+    if hidden and st.button(f"⬆️ Show earlier messages ({hidden} hidden)", key="load_earlier"):
+        st.session_state.transcript_window = window + TRANSCRIPT_PAGE_SIZE
+        rerun_chat_area()
+    with get_metrics().span("render"):
+        for msg in messages[hidden:]:
+            render_message(msg)
+
+    # Placeholders where the current submission and its streamed reply appear before the rerun
+    live_message = st.empty()
+    live_reply = st.empty()
 
     # Chat input form at the bottom
     with st.form("chat_form", clear_on_submit=True):
         user_input = st.text_area(
             "Type your message here...", 
             key="chat_input", 
-            disabled=st.session_state.conversation_ended,
+            disabled=interview.conversation_ended,
             placeholder="Type your answer or say 'next'/'back' to navigate questions"
         )
         submitted = st.form_submit_button(
             "Send", 
             use_container_width=True, 
-            disabled=st.session_state.conversation_ended
+            disabled=interview.conversation_ended
         )
 
         # Process user input if form is submitted and input is not empty
         if submitted and user_input.strip():
-            st.session_state.messages.append({"role": "user", "content": user_input}) # Add user message to history
-            response = handle_user_input(user_input) # Get response from chat logic
-            st.session_state.messages.append({"role": "assistant", "content": response}) # Add assistant response to history
-            save_state() # Save current state
-            st.rerun() # Rerun to update the chat display
+            info_was_collected = interview.info_collected
+            stage = turn_stage(user_input)
+            turn_started = time.perf_counter()
+            with get_metrics().span("turn", stage=stage):
+                interview.messages.append({"role": "user", "content": user_input}) # Add user message to history
+                live_message.markdown(f'<div class="message user">{user_input}</div>', unsafe_allow_html=True)
+                response = handle_user_input(user_input) # Get response from chat logic (streams into live_reply)
+                interview.messages.append({"role": "assistant", "content": response}) # Add assistant response to history
+                # Per-session time per stage, persisted with the state for the analytics export
+                interview.stage_seconds[stage] = interview.stage_seconds.get(stage, 0.0) + time.perf_counter() - turn_started
+                save_state() # Save current state
+            if METRICS_FILE:
+                get_metrics().write_prometheus(METRICS_FILE)
+            if interview.info_collected != info_was_collected:
+                st.rerun() # Full rerun so the sidebar shows the collected candidate details
+            rerun_chat_area() # Otherwise redraw only the chat area
+
+with col2: # Main chat column
+    st.markdown("## TalentScout")
+    st.markdown("### AI Hiring Assistant")
+    chat_area()
+
+# Script overhead of this run (full reruns only; fragment reruns are timed as turns)
+get_metrics().observe("rerun", time.perf_counter() - RERUN_STARTED)
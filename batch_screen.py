@@ -0,0 +1,221 @@
+"""
+Headless batch screening.
+
+Runs candidate profiles with pre-recorded answers through the same intake,
+question-generation and assessment logic as the app, in parallel worker
+processes, and streams one JSON result per candidate to a JSONL file.
+
+Input is JSONL or CSV. Each record holds the candidate fields used by the app
+("Full Name", "Email Address", "Tech Stack", ...), an "answers" list (one entry
+per question; an entry may itself be a list of answers to that question), and
+optionally "id" and a fixed "questions" list that skips generation. In CSV,
+"answers" and "questions" are JSON-encoded arrays.
+
+Usage:
+    python batch_screen.py candidates.jsonl -o results.jsonl --concurrency 8
+    python batch_screen.py candidates.csv --backend fake --concurrency 32
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict
+
+from intake import CANDIDATE_FIELDS, validate_candidate_info
+from llm_backend import create_backend
+from llm_cache import ResponseCache
+from llm_executor import LLMExecutor
+from llm_scheduler import DEFAULT_PRIORITIES, PRIORITY_NORMAL, RequestScheduler, estimate_tokens
+from question_bank import QuestionBank, select_questions
+from screening_index import ScreeningIndex
+from session_model import QAEntry
+from screening import (
+    ASSESSMENT_TEMPLATE, build_assessment_prompt, build_tech_questions_prompt, first_name,
+    format_qa_for_assessment, is_substantive_answer, parse_structured_questions, tech_stack_tokens
+)
+
+MODEL_NAME = "models/gemini-1.5-flash"
+
+# Per-process state, created once by `_init_worker`
+_worker = {}
+
+
+def read_candidates(path):
+    """Yields candidate records from a JSONL or CSV file."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                for key in ("answers", "questions"):
+                    if row.get(key):
+                        row[key] = json.loads(row[key])
+                yield row
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _init_worker(backend_mode, api_key, fixtures_path, language, use_cache, use_bank, rpm=None, tpm=None):
+    _worker["backend"] = create_backend(backend_mode, MODEL_NAME, api_key=api_key, fixtures_path=fixtures_path)
+    scheduler = RequestScheduler(rpm=rpm, tpm=tpm) if rpm or tpm else None
+    _worker["executor"] = LLMExecutor(max_workers=1, scheduler=scheduler)
+    _worker["cache"] = ResponseCache() if use_cache else None
+    _worker["language"] = language
+    _worker["bank"] = QuestionBank() if use_bank else None
+
+
+def _generate(call_type, inputs, prompt):
+    """Worker-side equivalent of the app's cached_generate(), without streaming."""
+    backend, executor, cache = _worker["backend"], _worker["executor"], _worker["cache"]
+
+    def generate():
+        return executor.run(
+            lambda: backend.generate_content(prompt).text,
+            priority=DEFAULT_PRIORITIES.get(call_type, PRIORITY_NORMAL),
+            tokens=estimate_tokens(prompt)
+        )
+
+    if cache is None:
+        return generate()
+    return cache.get_or_compute(call_type, inputs, _worker["language"], backend.model_name, generate)
+
+
+def screen_candidate(index, record):
+    """Runs one candidate through intake validation, questions and assessment."""
+    started = time.perf_counter()
+    language = _worker["language"]
+    candidate_info = {field: str(record.get(field) or "N/A") for field in CANDIDATE_FIELDS}
+    result = {"id": record.get("id", index), "candidate_info": candidate_info}
+    try:
+        all_present, missing, invalid = validate_candidate_info(candidate_info)
+        result.update(valid=all_present and not invalid, missing=missing, invalid=invalid)
+        if not result["valid"]:
+            return result
+
+        tech_stack = candidate_info["Tech Stack"]
+        if record.get("questions"):
+            questions = list(record["questions"])
+        else:
+            def generate(stack):
+                return parse_structured_questions(_generate(
+                    "tech_questions",
+                    {"tech_stack": tech_stack_tokens(stack), "format": "structured"},
+                    build_tech_questions_prompt(stack, language)
+                ))
+
+            if _worker["bank"] is not None:
+                structured = select_questions(_worker["bank"], tech_stack, language, generate)
+            else:
+                structured = generate(tech_stack)
+            questions = [f"{i+1}. {q['question']}" for i, q in enumerate(structured)]
+            result["follow_ups"] = [q["follow_ups"] for q in structured]
+        result["questions"] = questions
+
+        qa_map = {}
+        for q_idx, (question, answers) in enumerate(zip(questions, record.get("answers") or [])):
+            answers = answers if isinstance(answers, list) else [answers]
+            qa_map[q_idx] = QAEntry(
+                question=question,
+                answers=answers,
+                complete=any(is_substantive_answer(answer, question, tech_stack) for answer in answers)
+            )
+        result["qa"] = [asdict(qa) for qa in qa_map.values()]
+
+        if qa_map:
+            qa_text = format_qa_for_assessment(qa_map, tech_stack)
+            assessment = _generate(
+                "assessment", {"qa": qa_text}, build_assessment_prompt(tech_stack, qa_text, language)
+            )
+            result["assessment"] = ASSESSMENT_TEMPLATE.format(name=first_name(candidate_info), assessment=assessment)
+            result["assessment_text"] = assessment
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["elapsed_s"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def run_batch(records, output, concurrency, backend_mode="gemini", api_key=None, fixtures_path=None,
+              language="English", use_cache=True, search_index=None, use_bank=True, rpm=None, tpm=None):
+    """
+    Screens `records` across `concurrency` worker processes, writing each result to
+    `output` as soon as it completes (and adding assessed candidates to `search_index`,
+    a ScreeningIndex, if given). At most 2x`concurrency` candidates are in flight, so
+    memory stays flat for arbitrarily large inputs. `rpm`/`tpm` quotas are split evenly
+    between the workers. Returns the count.
+    """
+    completed = 0
+    worker_rpm = rpm / concurrency if rpm else None
+    worker_tpm = tpm / concurrency if tpm else None
+    with ProcessPoolExecutor(
+        max_workers=concurrency,
+        initializer=_init_worker,
+        initargs=(backend_mode, api_key, fixtures_path, language, use_cache, use_bank, worker_rpm, worker_tpm)
+    ) as pool:
+        pending = set()
+        for index, record in enumerate(records):
+            if len(pending) >= concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                completed += _write_results(done, output, search_index)
+            pending.add(pool.submit(screen_candidate, index, record))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            completed += _write_results(done, output, search_index)
+    return completed
+
+
+def _write_results(futures, output, search_index=None):
+    for future in futures:
+        result = future.result()
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        if search_index is not None and result.get("assessment_text"):
+            search_index.add(f"batch-{result['id']}", result["candidate_info"], result["assessment_text"])
+    output.flush()
+    return len(futures)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen candidates headlessly with TalentScout.")
+    parser.add_argument("input", help="JSONL or CSV file of candidate profiles and answers")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=os.cpu_count() or 4,
+                        help="number of parallel worker processes")
+    parser.add_argument("--backend", default=os.getenv("TALENTSCOUT_BACKEND", "gemini"),
+                        choices=["gemini", "fake", "record", "replay"], help="model backend")
+    parser.add_argument("--fixtures", default=os.getenv("TALENTSCOUT_FIXTURES"),
+                        help="fixture file for record/replay backends")
+    parser.add_argument("--language", default="English", help="language for questions and assessments")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the shared LLM response cache")
+    parser.add_argument("--no-bank", action="store_true", help="always generate questions instead of using the question bank")
+    parser.add_argument("--index", action="store_true",
+                        help="add assessed candidates to the recruiter search index")
+    parser.add_argument("--rpm", type=int, default=int(os.getenv("TALENTSCOUT_RPM", "0")),
+                        help="model requests per minute across all workers (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=int(os.getenv("TALENTSCOUT_TPM", "0")),
+                        help="model tokens per minute across all workers (0 = unlimited)")
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if args.backend in ("gemini", "record") and not api_key:
+        parser.error("GOOGLE_API_KEY must be set for the gemini and record backends")
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        count = run_batch(
+            read_candidates(args.input), output, max(1, args.concurrency), args.backend, api_key,
+            args.fixtures, args.language, not args.no_cache, ScreeningIndex() if args.index else None, not args.no_bank,
+            args.rpm, args.tpm
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(f"Screened {count} candidates in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.1f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
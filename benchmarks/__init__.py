@@ -0,0 +1,18 @@
+"""
+Performance benchmarks for TalentScout.
+
+Everything runs offline against the fake model backend:
+
+- scenarios.py: scripted interviews driven end to end through app.py with
+  Streamlit's AppTest (intake, question generation, short and substantive
+  answers, next/skip/back, language switches, a returning candidate, "done"),
+  measuring per-turn latency per stage, stored session size and memory per
+  session;
+- micro.py: micro-benchmarks of the hot helpers (validation, answer scoring,
+  assessment formatting, session save/load);
+- rerun_overhead.py: cold start and idle rerun time of app.py.
+
+`python -m benchmarks` runs them all, writes the results as JSON and compares
+them with the committed baseline (benchmarks/baseline.json), exiting non-zero on
+a regression. See `python -m benchmarks --help`.
+"""
@@ -0,0 +1,114 @@
+"""
+Runs the whole benchmark suite and compares it against the stored baseline.
+
+Usage:
+    python -m benchmarks                      # run, write results, compare with benchmarks/baseline.json
+    python -m benchmarks --update-baseline    # run and store the results as the new baseline
+    python -m benchmarks --skip e2e --output /tmp/bench.json
+
+Exits with status 1 when a metric regresses beyond its tolerance, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+SUITES = ("e2e", "micro", "rerun")
+
+# Allowed relative growth per metric suffix, and the absolute growth always tolerated (noise floor)
+TOLERANCES = {
+    "_ms": (0.5, 2.0),
+    "_us": (0.5, 2.0),
+    "_call": (0.5, 2.0), # us_per_call
+    "_bytes": (0.1, 256),
+    "_kb": (0.25, 16),
+}
+
+
+def run_rerun_overhead():
+    """Cold start and idle reruns, in a fresh process so the cold start is real."""
+    output = subprocess.run(
+        [sys.executable, os.path.join(BENCH_DIR, "rerun_overhead.py"), "--json"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return {f"rerun.{key}": value for key, value in result.items() if isinstance(value, (int, float))}
+
+
+def compare(results, baseline):
+    """Regressions as (metric, baseline value, new value) for every metric that grew beyond its tolerance."""
+    regressions = []
+    for metric, old in baseline.items():
+        new = results.get(metric)
+        tolerance = next((t for suffix, t in TOLERANCES.items() if metric.endswith(suffix)), None)
+        if new is None or tolerance is None:
+            continue
+        relative, floor = tolerance
+        if new > old * (1 + relative) and new - old > floor:
+            regressions.append((metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the TalentScout benchmark suite.")
+    parser.add_argument("--output", default=None, help="results file (default: a temp file)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--skip", action="append", default=[], choices=SUITES, help="suite to skip (repeatable)")
+    args = parser.parse_args(argv)
+
+    # Must happen before anything imports the app modules: they read their paths at import
+    from benchmarks import scenarios
+    scenarios.configure_environment(tempfile.mkdtemp(prefix="talentscout-bench-"))
+
+    metrics = {}
+    if "e2e" not in args.skip:
+        print("Running scripted interviews...", file=sys.stderr)
+        metrics.update(scenarios.run_all())
+    if "micro" not in args.skip:
+        print("Running micro-benchmarks...", file=sys.stderr)
+        from benchmarks import micro
+        metrics.update(micro.run_all())
+    if "rerun" not in args.skip:
+        print("Measuring rerun overhead...", file=sys.stderr)
+        metrics.update(run_rerun_overhead())
+
+    results = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "created": time.time()},
+        "metrics": metrics,
+    }
+    output = args.baseline if args.update_baseline else (
+        args.output or os.path.join(tempfile.gettempdir(), "talentscout-bench-results.json")
+    )
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    for metric, value in sorted(metrics.items()):
+        print(f"{metric:<52} {value}")
+    print(f"\nResults written to {output}", file=sys.stderr)
+    if args.update_baseline:
+        return 0
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.", file=sys.stderr)
+        return 0
+    regressions = compare(metrics, baseline)
+    for metric, old, new in regressions:
+        print(f"REGRESSION {metric}: {old} -> {new}", file=sys.stderr)
+    if not regressions:
+        print("No regressions against the baseline.", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Micro-benchmarks of the helpers on every turn's hot path.
+
+`save_state` and `load_state` in app.py need a Streamlit session, so they are
+timed inside an AppTest run that executes app.py and then calls its own
+functions (including the `_mark_persisted` bookkeeping after every save and load).
+"""
+import timeit
+
+from benchmarks.scenarios import APP_PATH, GOOD_ANSWERS, intake
+
+TECH_STACK = "Python, Django, PostgreSQL"
+INTAKE = intake("micro")
+
+
+def _interview(questions=5, answers_per_question=3):
+    """A realistic mid-to-late screening state."""
+    from session_model import InterviewState, QAEntry
+
+    qa_map = {
+        i: QAEntry(
+            question=f"{i + 1}. How would you approach problem {i} with {TECH_STACK}?",
+            answers=[GOOD_ANSWERS[(i + j) % len(GOOD_ANSWERS)] for j in range(answers_per_question)],
+            complete=True,
+        )
+        for i in range(questions)
+    }
+    messages = [{"role": "assistant", "content": "Welcome"}, {"role": "user", "content": INTAKE}]
+    for qa in qa_map.values():
+        for answer in qa.answers:
+            messages += [{"role": "assistant", "content": qa.question}, {"role": "user", "content": answer}]
+    return InterviewState(
+        messages=messages,
+        candidate_info={"Full Name": "Jane Doe", "Email Address": "jane.doe@example.com", "Tech Stack": TECH_STACK},
+        info_requested=True, info_collected=True, tech_questions_asked=True,
+        questions=[qa.question for qa in qa_map.values()],
+        prepared_follow_ups=[["Can you give an example?"] for _ in qa_map],
+        qa_map=qa_map, current_question_idx=questions,
+    )
+
+
+def _per_call_us(fn, min_time=0.2):
+    """Best-of-5 microseconds per call, with the repeat count chosen so one run takes ~`min_time` seconds."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return round(min(timer.repeat(repeat=5, number=number)) / number * 1e6, 2)
+
+
+def _time_persistence(app_path, state, per_call_us):
+    """
+    AppTest script: runs app.py, then times its `save_state` (one turn: two new messages
+    and a changed question index) and `load_state` on a stored session of `state`.
+    """
+    import itertools
+
+    import streamlit as st
+
+    from session_model import InterviewState
+
+    app = {"__file__": app_path, "__name__": "__main__"}
+    with open(app_path, "r", encoding="utf-8") as f:
+        exec(compile(f.read(), app_path, "exec"), app)
+
+    st.session_state.session_id = "micro"
+    st.session_state.interview = InterviewState.from_dict(state)
+    st.session_state._persisted = {"message_count": 0, "fields": {}}
+    app["save_state"]() # The session load_state reads
+    counter = itertools.count()
+
+    def save_state():
+        st.session_state.interview.current_question_idx = next(counter)
+        st.session_state._persisted["message_count"] -= 2 # The last two messages are this turn's
+        app["save_state"]()
+
+    st.session_state.session_id = "micro-save"
+    save_us = per_call_us(save_state)
+    st.session_state.session_id = "micro"
+    st.session_state._micro_results = {"save_state": save_us, "load_state": per_call_us(app["load_state"])}
+
+
+def _app_persistence(interview):
+    """Microseconds per call of app.py's save_state and load_state."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_function(
+        _time_persistence, default_timeout=300, args=(APP_PATH, interview.to_dict(), _per_call_us)
+    )
+    at.query_params["sid"] = "micro-bench"
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"Timing app persistence failed: {at.exception}")
+    return at.session_state["_micro_results"]
+
+
+def run_all():
+    """Returns flat metrics ({"micro.<name>.us_per_call": value})."""
+    from intake import extract_candidate_info, validate_candidate_info
+    from screening import format_qa_for_assessment, is_substantive_answer
+
+    interview = _interview()
+    info = extract_candidate_info(INTAKE)
+    question = interview.questions[0]
+    persistence = _app_persistence(interview)
+
+    return {
+        "micro.extract_candidate_info.us_per_call": _per_call_us(lambda: extract_candidate_info(INTAKE)),
+        "micro.validate_candidate_info.us_per_call": _per_call_us(lambda: validate_candidate_info(info)),
+        "micro.is_substantive_answer.us_per_call": _per_call_us(
+            lambda: is_substantive_answer(GOOD_ANSWERS[0], question, TECH_STACK)
+        ),
+        "micro.format_qa_for_assessment.us_per_call": _per_call_us(
+            lambda: format_qa_for_assessment(interview.qa_map, TECH_STACK)
+        ),
+        "micro.save_state.us_per_call": persistence["save_state"],
+        "micro.load_state.us_per_call": persistence["load_state"],
+    }
@@ -0,0 +1,101 @@
+"""
+Startup and per-rerun overhead of app.py.
+
+Streamlit re-executes the whole script on every interaction, so everything done
+at module level is paid again on each click. This runs the app headlessly with
+the fake backend (no network, no API key) through Streamlit's AppTest, once cold
+(in a fresh process) and then as repeated idle reruns of the same session.
+
+Script time is taken from the app's own "rerun" span (see metrics.py), read back
+from the metrics JSONL log, because AppTest polls for the end of a run and its
+wall-clock time is quantized to that polling interval.
+
+Idle runs make no model calls, so `--backend gemini` (which includes loading the
+Gemini SDK wherever the app does so) works with a placeholder API key.
+
+Usage:
+    python benchmarks/rerun_overhead.py --reruns 50
+    python benchmarks/rerun_overhead.py --backend gemini
+    python benchmarks/rerun_overhead.py --app /path/to/other/checkout/app.py --json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DEFAULT_APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def measure(app_path=DEFAULT_APP_PATH, reruns=30, backend="fake"):
+    """Runs one session once cold and `reruns` more times; returns timings in milliseconds."""
+    # Databases, caches and the log go to a scratch dir. Older checkouts read their assets from the
+    # working directory, so it links to the checkout's files, except the legacy session state,
+    # which the app would import and rename
+    app_path = os.path.abspath(app_path)
+    app_dir = os.path.dirname(app_path)
+    workdir = tempfile.mkdtemp(prefix="talentscout-bench-")
+    for name in os.listdir(app_dir):
+        if name != "talent_scout_session.json":
+            os.symlink(os.path.join(app_dir, name), os.path.join(workdir, name))
+    os.chdir(workdir)
+    log_path = os.path.join(workdir, "metrics.jsonl")
+    os.environ["TALENTSCOUT_BACKEND"] = backend
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    os.environ["TALENTSCOUT_METRICS_LOG"] = log_path
+    for name, filename in [("TALENTSCOUT_DB", "sessions.db"), ("TALENTSCOUT_INDEX_DB", "index.db"),
+                           ("TALENTSCOUT_QUESTION_BANK", "bank.db"), ("TALENTSCOUT_CACHE_DB", "cache.db")]:
+        os.environ[name] = os.path.join(workdir, filename)
+
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest # Part of the measured cold start
+    at = AppTest.from_file(app_path, default_timeout=60)
+    at.query_params["sid"] = "benchmark"
+    at.run()
+    cold = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception)
+    for _ in range(reruns):
+        at.run()
+
+    with open(log_path, "r", encoding="utf-8") as f:
+        spans = [json.loads(line)["value"] for line in f if '"metric": "rerun"' in line]
+    if len(spans) != reruns + 1:
+        raise RuntimeError(f"Expected {reruns + 1} rerun spans in the metrics log, found {len(spans)}")
+    first, rest = spans[0], spans[1:]
+    return {
+        "cold_start_ms": round(cold * 1000, 1), # Process start to first page, including imports
+        "first_run_ms": round(first * 1000, 2), # Script time of the first run of a session
+        "rerun_mean_ms": round(statistics.mean(rest) * 1000, 2) if rest else 0.0,
+        "rerun_p50_ms": round(_percentile(rest, 0.5) * 1000, 2) if rest else 0.0,
+        "rerun_p95_ms": round(_percentile(rest, 0.95) * 1000, 2) if rest else 0.0,
+        "reruns": reruns,
+        "backend": backend,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time app.py cold start and idle reruns.")
+    parser.add_argument("--app", default=DEFAULT_APP_PATH, help="app.py to measure (e.g. another checkout)")
+    parser.add_argument("--reruns", type=int, default=30, help="number of timed reruns")
+    parser.add_argument("--backend", default="fake", choices=["fake", "gemini"], help="model backend")
+    parser.add_argument("--json", action="store_true", help="print one JSON line instead of a table")
+    args = parser.parse_args(argv)
+
+    result = measure(args.app, max(1, args.reruns), args.backend)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        for key, value in result.items():
+            print(f"{key:>15}: {value}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Scripted interviews driven end to end through app.py.
+
+Each scenario is a list of steps: a string is typed into the chat and sent, a
+("language", name) tuple switches the interface language, and a ("resume", scenario)
+tuple resumes that scenario's screening with its resume code. Scenarios run through
+Streamlit's AppTest against the fake model backend, so they exercise the real
+app logic (dispatch, scoring, question bank, persistence) without network.
+
+Per scenario this reports the p50/p95/max turn latency (from the app's own
+"turn" spans, read back from the metrics log), the bytes the session occupies in
+the session store, and the in-memory size of its `st.session_state`.
+"""
+import dataclasses
+import json
+import os
+import sys
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+INTAKE = (
+    "Full Name: Jane Doe, Email: {email}, Phone: +1 555 123 4567, Years of Experience: 6, "
+    "Desired Position: Backend Engineer, Location: Berlin, Tech Stack: Python, Django, PostgreSQL"
+)
+FREEFORM_INTAKE = "Hi, I'm Sam, you can reach me at sam@example.com. I mostly work with Go and Postgres."
+GOOD_ANSWERS = [
+    "I'd use a token bucket per api_key stored in Redis, with INCR and EXPIRE in a Lua script so the check "
+    "is atomic, and return 429 with a Retry-After header once the bucket is empty.",
+    "I'd compare tracemalloc snapshots over time, look at the top allocation sites with objgraph, and check "
+    "caches and module-level dicts that grow without eviction, then confirm the fix under load.",
+    "I'd run EXPLAIN ANALYZE, add composite indexes matching the join and filter columns, check row estimates "
+    "against actual counts, and consider select_related or a materialized view for the hot path.",
+]
+
+
+
+def intake(candidate):
+    """Intake message of a distinct candidate (the same email and phone would be recognised as returning)."""
+    return INTAKE.format(email=f"{candidate}@example.com")
+
+
+SCENARIOS = {
+    "happy_path": [intake("happy"), *GOOD_ANSWERS, "done"],
+    "returning_resume": [intake("happy"), ("resume", "happy_path"), "done"],
+    "follow_ups": [
+        intake("follow-ups"), "not sure", "maybe a cache?", GOOD_ANSWERS[0], "idk", "skip", "back", GOOD_ANSWERS[1],
+        "next", GOOD_ANSWERS[2], "done",
+    ],
+    "language_switch": [
+        intake("language"), GOOD_ANSWERS[0], ("language", "Spanish"), "no estoy seguro", GOOD_ANSWERS[1],
+        ("language", "English"), GOOD_ANSWERS[2], "done",
+    ],
+    "freeform_intake": [FREEFORM_INTAKE, GOOD_ANSWERS[0], "done", *GOOD_ANSWERS[1:], "done"],
+    "long_session": [intake("long"), *(["next", "back"] * 20), *GOOD_ANSWERS, "done"],
+}
+
+
+def configure_environment(workdir):
+    """Points the app at the fake backend and scratch databases. Call before anything imports the app modules."""
+    os.environ["TALENTSCOUT_BACKEND"] = "fake"
+    os.environ["TALENTSCOUT_METRICS_LOG"] = os.path.join(workdir, "metrics.jsonl")
+    for name, filename in [("TALENTSCOUT_DB", "sessions.db"), ("TALENTSCOUT_INDEX_DB", "index.db"),
+                           ("TALENTSCOUT_QUESTION_BANK", "bank.db"), ("TALENTSCOUT_CACHE_DB", "cache.db")]:
+        os.environ[name] = os.path.join(workdir, filename)
+    os.chdir(workdir) # Not the checkout: the app would import (and rename) its legacy session file
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+
+
+def deep_size(obj, seen=None):
+    """Approximate memory held by an object graph (containers, dataclasses and plain objects)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif dataclasses.is_dataclass(obj):
+        size += sum(deep_size(getattr(obj, f.name), seen) for f in dataclasses.fields(obj))
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def _turn_spans(log_path, offset):
+    """(stage, seconds) of every turn logged after `offset`, and the new offset."""
+    with open(log_path, "r", encoding="utf-8") as f:
+        f.seek(offset)
+        entries = [json.loads(line) for line in f if line.strip()]
+        offset = f.tell()
+    return [(e["labels"]["stage"], e["value"]) for e in entries if e["metric"] == "turn"], offset
+
+
+def run_scenario(steps, session_id):
+    """Plays one scenario in a fresh browser session and returns the AppTest."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.query_params["sid"] = session_id
+    at.run()
+    for step in steps:
+        if isinstance(step, tuple) and step[0] == "language":
+            at.selectbox(key="language_selector").select(step[1]).run()
+        else:
+            if isinstance(step, tuple): # ("resume", scenario): the code that scenario's screening was given
+                from session_model import InterviewState
+                from session_store import SessionStore
+                previous = SessionStore(os.environ["TALENTSCOUT_DB"]).load(f"bench-{step[1]}")
+                step = f"resume {InterviewState.from_dict(previous).resume_code}"
+            at.text_area(key="chat_input").input(step)
+            at.button[-1].click() # The form's send button comes last
+            at.run()
+        if at.exception:
+            raise RuntimeError(f"{session_id}: step {step!r} failed: {at.exception}")
+    return at
+
+
+def run_all(scenarios=SCENARIOS):
+    """Runs every scenario once and returns flat metrics ({"e2e.<scenario>.<metric>": value})."""
+    from session_store import SessionStore
+
+    log_path = os.environ["TALENTSCOUT_METRICS_LOG"]
+    store = SessionStore(os.environ["TALENTSCOUT_DB"])
+    run_scenario([intake("warmup"), *GOOD_ANSWERS, "done"], "warmup") # Imports, cached resources and the question bank
+    offset = os.path.getsize(log_path)
+
+    results, by_stage = {}, {}
+    for name, steps in scenarios.items():
+        at = run_scenario(steps, f"bench-{name}")
+        spans, offset = _turn_spans(log_path, offset)
+        durations = [seconds for _, seconds in spans]
+        for stage, seconds in spans:
+            by_stage.setdefault(stage, []).append(seconds)
+        state = {key: at.session_state[key] for key in at.session_state if not key.startswith("$$")}
+        results.update({
+            f"e2e.{name}.turns": len(durations),
+            f"e2e.{name}.turn_p50_ms": round(_percentile(durations, 0.5) * 1000, 3),
+            f"e2e.{name}.turn_p95_ms": round(_percentile(durations, 0.95) * 1000, 3),
+            f"e2e.{name}.turn_max_ms": round(max(durations, default=0.0) * 1000, 3),
+            f"e2e.{name}.stored_bytes": store.stored_bytes(f"bench-{name}"),
+            f"e2e.{name}.session_state_kb": round(deep_size(state) / 1024, 1),
+        })
+    for stage, durations in sorted(by_stage.items()):
+        results[f"e2e.stage.{stage}.p50_ms"] = round(_percentile(durations, 0.5) * 1000, 3)
+        results[f"e2e.stage.{stage}.p95_ms"] = round(_percentile(durations, 0.95) * 1000, 3)
+    return results
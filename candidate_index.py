@@ -0,0 +1,67 @@
+"""
+Index of returning candidates.
+
+Maps a candidate's identity, their normalized email plus E.164 phone number (see
+`intake.candidate_key`), to the latest session in which they completed intake. A
+candidate who comes back with the same email and phone is recognised at intake:
+their details are pre-filled and they can resume or reuse their previous question
+set instead of going through extraction and question generation again.
+
+Both parts of the key must match, so an email address alone does not reveal a
+previous session that was registered with a phone number.
+
+Lives in the recruiter index database (TALENTSCOUT_INDEX_DB) next to the
+`screenings` tables.
+"""
+import sqlite3
+import threading
+import time
+
+from screening_index import DEFAULT_INDEX_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (email, phone)
+) WITHOUT ROWID;
+"""
+
+
+class CandidateIndex:
+    """SQLite lookup from (email, phone) to a candidate's latest session."""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def register(self, key, session_id):
+        """Makes `session_id` the latest session of the candidate identified by `key` (email, phone)."""
+        email, phone = key
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO candidates (email, phone, session_id, updated_at) VALUES (?, ?, ?, ?)",
+                (email, phone, session_id, time.time()),
+            )
+
+    def lookup(self, key, exclude_session=None):
+        """The candidate's latest session ID other than `exclude_session`, or None."""
+        email, phone = key
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT session_id FROM candidates WHERE email = ? AND phone = ?", (email, phone)
+            ).fetchone()
+        if row is None or row[0] == exclude_session:
+            return None
+        return row[0]
+
+    def forget(self, session_id):
+        """Drops every key pointing at a session (e.g. when the session is deleted)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM candidates WHERE session_id = ?", (session_id,))
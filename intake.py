@@ -0,0 +1,193 @@
+"""
+Candidate intake: a deterministic local extractor for candidate details and the
+validation rules applied to them.
+
+Most candidates answer the intake prompt with labelled "Field: value" pairs (our
+own example format), which can be parsed locally without an LLM round-trip. The
+model is only needed for whatever this parser cannot resolve.
+"""
+import os
+import re
+
+CANDIDATE_FIELDS = [
+    "Full Name",
+    "Email Address",
+    "Phone Number",
+    "Years of Experience",
+    "Desired Position(s)",
+    "Current Location",
+    "Tech Stack",
+]
+REQUIRED_FIELDS = ["Full Name", "Email Address", "Tech Stack"]
+
+# Labels a candidate may use for each field (matched case-insensitively)
+FIELD_LABELS = {
+    "Full Name": ["full name", "name"],
+    "Email Address": ["email address", "email", "e-mail", "mail"],
+    "Phone Number": ["phone number", "phone", "mobile", "contact number", "contact"],
+    "Years of Experience": ["years of tech experience", "years of experience", "experience", "yoe"],
+    "Desired Position(s)": ["desired position(s)", "desired positions", "desired position",
+                            "preferred role(s)", "preferred roles", "preferred role", "position", "role"],
+    "Current Location": ["current location", "location", "city"],
+    "Tech Stack": ["your tech stack", "tech stack", "skills", "technologies"],
+}
+
+_LABEL_TO_FIELD = {label: field for field, labels in FIELD_LABELS.items() for label in labels}
+# Longest labels first so "email address" wins over "email"
+_LABEL_PATTERN = re.compile(
+    r"(?:^|(?<=[\n,;|]))\s*[-*•]?\s*\**(" +
+    "|".join(re.escape(label) for label in sorted(_LABEL_TO_FIELD, key=len, reverse=True)) +
+    r")\**\s*[:=]",
+    re.IGNORECASE,
+)
+EMAIL_PATTERN = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+PHONE_PATTERN = re.compile(r"\+?\(?\d[\d\s\-()]{5,}\d")
+YEARS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)\b", re.IGNORECASE)
+# Whole-value validation patterns, compiled once at import instead of on every call
+VALID_EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+VALID_PHONE_PATTERN = re.compile(r"^\+?[\d\s\-()]+$") # Allows digits, spaces, hyphens, parentheses
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+_NON_DIGIT_PATTERN = re.compile(r"\D")
+_STACK_SEPARATOR_PATTERN = re.compile(r"[,;/|]|\band\b")
+
+# Country calling code assumed for phone numbers given without one (e.g. "1" or "91"); empty: none
+DEFAULT_COUNTRY_CODE = os.getenv("TALENTSCOUT_COUNTRY_CODE", "").lstrip("+")
+
+
+def _clean(value):
+    return value.strip().strip(",;|").strip()
+
+
+def _normalize_field(field, value):
+    """Returns the canonical form of a labelled value, or None if it does not resolve."""
+    value = _clean(value)
+    if not value or value.lower() == "n/a":
+        return None
+    if field == "Email Address":
+        match = EMAIL_PATTERN.search(value)
+        return match.group(0) if match else value
+    if field == "Years of Experience":
+        match = _NUMBER_PATTERN.search(value)
+        return match.group(0) if match else value
+    if field == "Tech Stack":
+        tokens = [t.strip() for t in _STACK_SEPARATOR_PATTERN.split(value) if t.strip()]
+        return ", ".join(tokens)
+    return value
+
+
+def extract_candidate_info(text):
+    """
+    Parses candidate details from free-form intake text without calling the model.
+    Returns a dict containing only the fields it could resolve.
+    """
+    info = {}
+
+    # Labelled "Field: value" pairs; each value runs until the next label
+    matches = list(_LABEL_PATTERN.finditer(text))
+    for i, match in enumerate(matches):
+        field = _LABEL_TO_FIELD[match.group(1).lower()]
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        value = _normalize_field(field, text[match.end():end])
+        if value and field not in info:
+            info[field] = value
+
+    # Unlabelled fallbacks for values with a recognizable shape
+    if "Email Address" not in info:
+        match = EMAIL_PATTERN.search(text)
+        if match:
+            info["Email Address"] = match.group(0)
+    if "Phone Number" not in info:
+        for match in PHONE_PATTERN.finditer(text):
+            if len(_NON_DIGIT_PATTERN.sub("", match.group(0))) >= 7:
+                info["Phone Number"] = match.group(0).strip()
+                break
+    if "Years of Experience" not in info:
+        match = YEARS_PATTERN.search(text)
+        if match:
+            info["Years of Experience"] = match.group(1)
+
+    return info
+
+
+def validate_candidate_info(info):
+    """
+    Validates extracted candidate information (email format, phone, years of experience).
+    Returns if all required fields are present, a list of missing fields, and invalid fields.
+    """
+    all_present = True
+    missing_fields = []
+    invalid_fields = []
+
+    # Check required fields
+    for field in REQUIRED_FIELDS:
+        value = str(info.get(field, "")).strip()
+        if not value or value.lower() == "n/a":
+            all_present = False
+            missing_fields.append(field)
+
+    # Validate email format
+    email = str(info.get("Email Address", ""))
+    if email and email.lower() != "n/a":
+        if not VALID_EMAIL_PATTERN.match(email):
+            invalid_fields.append("Email Address (invalid format)")
+
+    # Validate phone number
+    phone = str(info.get("Phone Number", ""))
+    if phone and phone.lower() != "n/a":
+        if not VALID_PHONE_PATTERN.match(phone):
+            invalid_fields.append("Phone Number (invalid format)")
+
+    # Validate years of experience
+    years_exp = str(info.get("Years of Experience", ""))
+    if years_exp and years_exp.lower() != "n/a":
+        try:
+            exp = float(years_exp)
+            if not (0 <= exp <= 50): # Assuming a reasonable range for experience
+                invalid_fields.append("Years of Experience (unrealistic value)")
+        except ValueError:
+            invalid_fields.append("Years of Experience (not a number)")
+
+    return all_present, missing_fields, invalid_fields
+
+
+# --- Candidate Identity ---
+def normalize_email(email):
+    """Case-insensitive form of an email address."""
+    return str(email or "").strip().lower()
+
+
+def normalize_phone(phone, default_country_code=DEFAULT_COUNTRY_CODE):
+    """
+    E.164 form of a phone number ("+15551234567"). Numbers written without a country
+    code ("0151 234 5678") get `default_country_code` after dropping the trunk 0; without
+    one they are returned as bare national digits. None if it has too few or too many digits.
+    """
+    phone = str(phone or "").strip()
+    digits = _NON_DIGIT_PATTERN.sub("", phone)
+    if phone.startswith("+"):
+        number = digits
+    elif digits.startswith("00"): # International dialling prefix
+        number = digits[2:]
+    elif default_country_code:
+        number = default_country_code + digits.lstrip("0")
+    else:
+        number = digits
+    if not 7 <= len(number) <= 15:
+        return None
+    return f"+{number}" if phone.startswith("+") or digits.startswith("00") or default_country_code else number
+
+
+def candidate_key(info):
+    """
+    Identity of a candidate for recognising repeat visits: (normalized email, E.164 phone
+    or ""). None unless `validate_candidate_info()` accepts the email and any phone given.
+    """
+    _, _, invalid = validate_candidate_info(info)
+    email = str(info.get("Email Address", "")).strip()
+    phone = str(info.get("Phone Number", "")).strip()
+    if not email or email.lower() == "n/a" or any(f.startswith(("Email Address", "Phone Number")) for f in invalid):
+        return None
+    if not phone or phone.lower() == "n/a":
+        return normalize_email(email), ""
+    phone = normalize_phone(phone)
+    return (normalize_email(email), phone) if phone else None
@@ -0,0 +1,261 @@
+"""
+Pluggable model backends.
+
+The app only ever calls `generate_content(...)` on its backend, so the real
+Gemini model can be swapped for:
+
+- FakeBackend: a scripted, deterministic model with configurable latency and
+  outputs, for load tests and profiling without network or quota.
+- RecordingBackend: wraps a real backend and appends every response to a JSONL
+  fixture file.
+- ReplayBackend: answers from such a fixture file, byte-for-byte, and fails
+  loudly on any request that was never recorded.
+
+Select one with the TALENTSCOUT_BACKEND environment variable
+(gemini | fake | record | replay); see `create_backend()`.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+DEFAULT_FIXTURES_PATH = os.path.join("fixtures", "llm_recordings.jsonl")
+DEFAULT_CHUNK_SIZE = 24  # Characters per streamed chunk for local backends
+
+
+class ReplayMissError(LookupError):
+    """Raised when replay mode receives a request that has no recording."""
+
+
+def chunk_text(chunk):
+    """Text of a streamed chunk; chunks without text parts (e.g. a bare finish reason) count as empty."""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def entry_role(entry):
+    """Returns the role of a content entry (dict or SDK Content)."""
+    return entry["role"] if isinstance(entry, dict) else entry.role
+
+
+def entry_text(entry):
+    """Returns the concatenated text parts of a content entry (dict or SDK Content)."""
+    parts = entry["parts"] if isinstance(entry, dict) else entry.parts
+    return "".join(part if isinstance(part, str) else getattr(part, "text", "") for part in parts)
+
+
+def canonical_contents(contents):
+    """Normalizes a prompt string or a list of chat contents to [(role, text), ...]."""
+    if isinstance(contents, str):
+        return [("user", contents)]
+    return [(entry_role(c), entry_text(c)) for c in contents]
+
+
+def request_key(model_name, contents, **kwargs):
+    """Stable hash of one model request. Transport options (stream, timeouts) are excluded."""
+    options = {k: v for k, v in kwargs.items() if k not in ("stream", "request_options")}
+    payload = json.dumps(
+        {"model": model_name, "contents": canonical_contents(contents), "options": options},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TextResponse:
+    """Minimal stand-in for a Gemini response: `.text` plus iteration over streamed chunks."""
+
+    def __init__(self, text, chunk_size=DEFAULT_CHUNK_SIZE, chunk_delay=0.0):
+        self.text = text
+        self._chunk_size = chunk_size
+        self._chunk_delay = chunk_delay
+
+    def __iter__(self):
+        for start in range(0, len(self.text), self._chunk_size):
+            if self._chunk_delay:
+                time.sleep(self._chunk_delay)
+            yield TextResponse(self.text[start:start + self._chunk_size])
+
+
+class GeminiBackend:
+    """The real Google Gemini model."""
+
+    def __init__(self, model_name, api_key):
+        import google.generativeai as genai # Imported lazily so offline backends never load the SDK
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        return self._model.generate_content(contents, stream=stream, **kwargs)
+
+
+_FAKE_PLACEHOLDERS = {
+    "Full Name": "Test Candidate",
+    "Email Address": "candidate@example.com",
+    "Tech Stack": "Python, SQL",
+}
+_FAKE_QUESTIONS = [
+    {"question": "How would you design a rate limiter for a public REST API?",
+     "follow_ups": ["Which algorithm would you choose, and why?",
+                    "How would you share limits across several API servers?"]},
+    {"question": "Walk through how you would debug a memory leak in a long-running service.",
+     "follow_ups": ["Which tools would you use to find what is holding the memory?"]},
+    {"question": "How would you optimize a slow database query that joins three large tables?",
+     "follow_ups": ["How would you confirm that your index is actually used?"]},
+]
+
+
+def _requested_fields(prompt):
+    return re.findall(r'"([^"]+)":\s*"\.\.\."', prompt)
+
+
+def _fake_extraction(prompt):
+    """Fills every field the extraction prompt asks for with deterministic placeholder values."""
+    fields = _requested_fields(prompt)
+    return "```json\n" + json.dumps({f: _FAKE_PLACEHOLDERS.get(f, "N/A") for f in fields}, indent=2) + "\n```"
+
+
+def _fake_intake(prompt):
+    """Structured response to the combined intake prompt: placeholder details plus the scripted questions."""
+    details = prompt.split("Generate", 1)[0] # The response shape further down names question fields too
+    candidate = {f: _FAKE_PLACEHOLDERS.get(f, "N/A") for f in _requested_fields(details)}
+    return json.dumps({"candidate": candidate, "questions": _FAKE_QUESTIONS}, indent=2)
+
+
+# (pattern, response) pairs tried in order against the last user message
+DEFAULT_FAKE_RULES = [
+    (r"Extract these candidate details", _fake_intake),
+    (r"Extract the following", _fake_extraction),
+    (r"technical questions", json.dumps(_FAKE_QUESTIONS, indent=2)),
+    (r"follow-up question", "Could you walk me through a concrete example from a project you worked on?"),
+    (r"technical assessment", (
+        "The candidate shows solid practical knowledge and explains trade-offs clearly. "
+        "Answers could go deeper on scalability and testing. Overall competency: 3/5."
+    )),
+]
+DEFAULT_FAKE_REPLY = "Thanks! Let's continue with the screening."
+
+
+class FakeBackend:
+    """
+    Scripted local model. Responses come from regex rules matched against the last
+    user message (a rule's response may be a string or a callable taking the
+    prompt). `latency` is slept before answering and `chunk_delay` between
+    streamed chunks.
+    """
+
+    def __init__(self, rules=None, default=DEFAULT_FAKE_REPLY, latency=0.0, chunk_delay=0.0,
+                 model_name="fake"):
+        self.model_name = model_name
+        self.rules = [(re.compile(p, re.IGNORECASE), r) for p, r in (rules or DEFAULT_FAKE_RULES)]
+        self.default = default
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def from_script(cls, path, latency=0.0, chunk_delay=0.0, **kwargs):
+        """
+        Loads a JSON script: {"latency": 0.5, "chunk_delay": 0.02, "default": "...",
+        "rules": [{"match": "regex", "response": "text"}, ...]}. Scripted rules are
+        tried before the built-in ones.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            script = json.load(f)
+        rules = [(r["match"], r["response"]) for r in script.get("rules", [])] + DEFAULT_FAKE_RULES
+        return cls(
+            rules=rules,
+            default=script.get("default", DEFAULT_FAKE_REPLY),
+            latency=script.get("latency", latency),
+            chunk_delay=script.get("chunk_delay", chunk_delay),
+            **kwargs
+        )
+
+    def respond(self, prompt):
+        for pattern, response in self.rules:
+            if pattern.search(prompt):
+                return response(prompt) if callable(response) else response
+        return self.default
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = canonical_contents(contents)[-1][1]
+        return TextResponse(self.respond(prompt), chunk_delay=self.chunk_delay)
+
+
+class RecordingBackend:
+    """Passes requests to `inner` and appends every completed response to a JSONL fixture file."""
+
+    def __init__(self, inner, path=DEFAULT_FIXTURES_PATH):
+        self.inner = inner
+        self.model_name = inner.model_name
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _record(self, key, text):
+        line = json.dumps({"key": key, "text": text}, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        key = request_key(self.model_name, contents, **kwargs)
+        response = self.inner.generate_content(contents, stream=stream, **kwargs)
+        if not stream:
+            self._record(key, response.text)
+            return response # Keeps the inner response's usage metadata
+        return self._record_stream(key, response)
+
+    def _record_stream(self, key, response):
+        text = ""
+        for chunk in response:
+            text += chunk_text(chunk)
+            yield chunk
+        self._record(key, text)
+
+
+class ReplayBackend:
+    """Answers requests from a fixture file written by RecordingBackend."""
+
+    def __init__(self, path=DEFAULT_FIXTURES_PATH, model_name="replay", latency=0.0):
+        self.model_name = model_name
+        self.latency = latency
+        self.recordings = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.recordings[record["key"]] = record["text"]
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        key = request_key(self.model_name, contents, **kwargs)
+        if key not in self.recordings:
+            raise ReplayMissError(f"No recorded response for request {key[:12]}")
+        if self.latency:
+            time.sleep(self.latency)
+        return TextResponse(self.recordings[key])
+
+
+def create_backend(mode, model_name, api_key=None, fixtures_path=None, fake_script=None, fake_latency=0.0):
+    """Builds the backend for `mode` (gemini | fake | record | replay)."""
+    fixtures_path = fixtures_path or DEFAULT_FIXTURES_PATH
+    if mode == "gemini":
+        return GeminiBackend(model_name, api_key)
+    if mode == "fake":
+        if fake_script:
+            return FakeBackend.from_script(fake_script, latency=fake_latency)
+        return FakeBackend(latency=fake_latency)
+    if mode == "record":
+        return RecordingBackend(GeminiBackend(model_name, api_key), fixtures_path)
+    if mode == "replay":
+        return ReplayBackend(fixtures_path, model_name=model_name)
+    raise ValueError(f"Unknown model backend: {mode!r}")
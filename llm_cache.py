@@ -0,0 +1,150 @@
+"""
+Content-addressed cache for Gemini responses.
+
+Responses are keyed by a hash of (call type, normalized inputs, language, model
+name). Lookups go through an in-memory LRU tier first and an on-disk SQLite tier
+second; each call type has its own policy deciding whether it is cached at all,
+for how long, and whether it may be written to disk. Responses to candidates'
+intake messages contain their personal details, so they stay in memory only.
+Expired rows are purged when the cache is opened and then hourly.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+DEFAULT_CACHE_PATH = os.getenv("TALENTSCOUT_CACHE_DB", "llm_response_cache.db")
+DEFAULT_MAX_ENTRIES = 1024  # In-memory LRU capacity
+PURGE_INTERVAL = 3600  # Seconds between deletions of expired rows
+
+CachePolicy = namedtuple("CachePolicy", ["cacheable", "ttl", "persist"], defaults=[True])
+
+# Per-call-type policies; ttl is in seconds
+DEFAULT_POLICIES = {
+    "tech_questions": CachePolicy(cacheable=True, ttl=7 * 24 * 3600),
+    "follow_up": CachePolicy(cacheable=True, ttl=24 * 3600),
+    "extraction": CachePolicy(cacheable=True, ttl=3600, persist=False),  # Candidate PII: memory only
+    "intake": CachePolicy(cacheable=True, ttl=3600, persist=False),  # Combined extraction + questions
+    "assessment": CachePolicy(cacheable=False, ttl=0),  # Unique per candidate, never reused
+}
+
+
+def _normalize(value):
+    """Collapses whitespace in strings (recursively) so trivial formatting differences share a key."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_cache_key(call_type, inputs, language, model_name):
+    """Returns the content address for one model call."""
+    payload = json.dumps(
+        [call_type, _normalize(inputs), language, model_name],
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) response cache with hit/miss counters."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, policies=None):
+        self.max_entries = max_entries
+        self.policies = dict(DEFAULT_POLICIES, **(policies or {}))
+        self._memory = OrderedDict()  # key -> (expires_at, text)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, call_type TEXT NOT NULL, text TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.purge()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+
+    def policy(self, call_type):
+        return self.policies.get(call_type, CachePolicy(cacheable=False, ttl=0))
+
+    def get(self, key):
+        """Returns the cached text for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT text, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                if row[1] > now:
+                    self._remember(key, row[1], row[0])
+                    self.counters["disk_hits"] += 1
+                    return row[0]
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, call_type, key, text):
+        """Stores a response in memory, and on disk if the call type's policy allows it."""
+        policy = self.policy(call_type)
+        if not policy.cacheable or not text:
+            return
+        expires_at = time.time() + policy.ttl
+        with self._lock:
+            self._remember(key, expires_at, text)
+            if policy.persist:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, call_type, text, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, call_type, text, expires_at),
+                )
+        if time.time() >= self._next_purge:
+            self.purge()
+
+    def purge(self):
+        """Deletes expired rows, and rows of call types that may no longer be kept on disk."""
+        memory_only = [call_type for call_type, policy in self.policies.items() if not policy.persist]
+        with self._lock:
+            self._next_purge = time.time() + PURGE_INTERVAL
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._conn.executemany("DELETE FROM responses WHERE call_type = ?", [(c,) for c in memory_only])
+
+    def _remember(self, key, expires_at, text):
+        self._memory[key] = (expires_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_compute(self, call_type, inputs, language, model_name, compute):
+        """
+        Returns the cached response for this call, or runs `compute()` (the real
+        model call) and caches its text. Errors from `compute()` are never cached.
+        """
+        if not self.policy(call_type).cacheable:
+            with self._lock:
+                self.counters["bypassed"] += 1
+            return compute()
+
+        key = make_cache_key(call_type, inputs, language, model_name)
+        text = self.get(key)
+        if text is None:
+            text = compute()
+            self.put(call_type, key, text)
+        return text
+
+    def stats(self):
+        """Returns a copy of the hit/miss counters plus the current memory tier size."""
+        with self._lock:
+            return dict(self.counters, memory_entries=len(self._memory))
@@ -0,0 +1,330 @@
+"""
+Shared execution layer for Gemini calls.
+
+All sessions submit model calls to one bounded thread pool (exposed to the app
+as a cached resource), so the number of in-flight requests per process is capped
+and the underlying gRPC channel is reused. Each call gets a per-attempt timeout
+and is retried with exponential backoff on transient `google.api_core` errors.
+
+With a `RequestScheduler` (llm_scheduler.py) attached, every attempt first waits
+for admission under the project's RPM/TPM quota. The first admission happens in
+the calling thread, so the caller can show its queue position; rate-limit errors
+pause the scheduler instead of each call backing off on its own.
+
+`run` and `stream` also take an overall `deadline`. With `hedge_after`, a
+duplicate request is sent once that many seconds pass without a response (or as
+soon as the first one fails with a retryable error), and whichever answers first
+is used. Any other error fails the call at once, since a duplicate would fail too. Hedges are not
+sent while other calls wait for quota, wait for admission no longer than the
+deadline, and are dropped once the caller has stopped waiting. A call that
+still has no complete response at the deadline raises LLMDeadlineError, so the
+caller can fall back to local content and the turn's latency stays bounded.
+"""
+import functools
+import queue
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from llm_scheduler import PRIORITY_NORMAL, QueueTimeoutError
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_TIMEOUT = 60.0  # Seconds per attempt
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 1.0  # Seconds; doubled after every failed attempt
+BACKOFF_MAX = 16.0
+
+
+@functools.cache
+def api_errors():
+    """
+    (retryable, rate-limit) error classes. Retryable are rate limits, overload and transient
+    server/network failures. google.api_core is only imported once a call fails, so offline
+    backends never load it.
+    """
+    from google.api_core import exceptions
+
+    rate_limit = (exceptions.ResourceExhausted, exceptions.TooManyRequests)
+    return rate_limit + (
+        exceptions.ServiceUnavailable,
+        exceptions.InternalServerError,
+        exceptions.DeadlineExceeded,
+        exceptions.GatewayTimeout,
+    ), rate_limit
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a model call does not finish within its time budget."""
+
+
+class LLMDeadlineError(LLMTimeoutError):
+    """Raised when no (hedged) attempt of a call completes before its deadline."""
+
+
+class LLMExecutor:
+    """Bounded pool that runs model calls with timeouts and retry/backoff."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, scheduler=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.scheduler = scheduler
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self.counters = {
+            "submitted": 0, "retries": 0, "timeouts": 0, "failures": 0, "hedges": 0, "hedge_wins": 0, "deadline_misses": 0
+        }
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def admit(self, priority=PRIORITY_NORMAL, tokens=0, on_wait=None, timeout=None):
+        """Waits for the scheduler (if any) to admit one request; raises QueueTimeoutError."""
+        if self.scheduler is not None:
+            self.scheduler.acquire(priority, tokens, on_wait=on_wait, timeout=timeout)
+
+    def _admit_within(self, deadline, priority, tokens, on_wait):
+        # Queueing counts against a call's deadline, so running out of time there is a miss too
+        try:
+            self.admit(priority, tokens, on_wait, timeout=deadline)
+        except QueueTimeoutError:
+            if deadline is not None:
+                self._count("deadline_misses")
+            raise
+
+    @staticmethod
+    def _fails_every_attempt(error):
+        # Not a transient API error (a bad request, a replay miss): a duplicate fails the same way.
+        # A hedge that was never admitted only means the other attempt is still the one to wait for.
+        return not isinstance(error, api_errors()[0] + (QueueTimeoutError, CancelledError))
+
+    def _can_hedge(self):
+        """Hedging doubles a call's load, so it is skipped while other calls wait for quota."""
+        return self.scheduler is None or self.scheduler.queue_length() == 0
+
+    def _run_with_retries(self, fn, args, kwargs, retries, priority=PRIORITY_NORMAL, tokens=0, admitted=True,
+                          end=None, cancelled=None):
+        # Unless `admitted` (by the caller), every attempt queues for admission, for at most
+        # the time left until `end`. Once nobody waits for the result any more (`cancelled`),
+        # a queued attempt leaves the queue and no further attempt is sent.
+        def check_cancelled(*_):
+            if cancelled is not None and cancelled.is_set():
+                raise CancelledError()
+
+        delay = BACKOFF_BASE
+        for attempt in range(retries + 1):
+            check_cancelled()
+            if attempt or not admitted:
+                self.admit(priority, tokens, on_wait=check_cancelled,
+                           timeout=None if end is None else max(0.0, end - time.monotonic()))
+                check_cancelled()
+            try:
+                result = fn(*args, **kwargs)
+                if self.scheduler is not None:
+                    self.scheduler.report_success()
+                return result
+            except Exception as e:
+                retryable_errors, rate_limit_errors = api_errors()
+                if not isinstance(e, retryable_errors):
+                    raise
+                if attempt == retries:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                if self.scheduler is not None and isinstance(e, rate_limit_errors):
+                    self.scheduler.report_rate_limited(e) # Pauses every caller, not just this one
+                    continue
+                time.sleep(min(delay, BACKOFF_MAX) * (0.5 + random.random())) # Jittered backoff
+                delay *= 2
+
+    def submit(self, fn, *args, retries=None, priority=PRIORITY_NORMAL, tokens=0, on_wait=None, **kwargs):
+        """
+        Waits for admission, schedules `fn(*args, **kwargs)` on the pool (with retries)
+        and returns its Future.
+        """
+        self.admit(priority, tokens, on_wait)
+        self._count("submitted")
+        return self._pool.submit(
+            self._run_with_retries, fn, args, kwargs, self.retries if retries is None else retries, priority, tokens
+        )
+
+    def submit_background(self, fn, *args, retries=None, priority=PRIORITY_NORMAL, tokens=0, cancelled=None, **kwargs):
+        """
+        Like `submit`, but admission is also waited for on the pool, so the caller never
+        blocks. For speculative calls whose result nobody is waiting on yet: setting the
+        `cancelled` event takes the call out of the queue, or stops its retries, and the
+        Future then raises CancelledError. A request already sent runs to completion.
+        """
+        retries = self.retries if retries is None else retries
+        self._count("submitted")
+        return self._pool.submit(
+            self._run_with_retries, fn, args, kwargs, retries, priority, tokens, False, None, cancelled
+        )
+
+    def run(self, fn, *args, timeout=None, retries=None, priority=PRIORITY_NORMAL, tokens=0, on_wait=None,
+            deadline=None, hedge_after=None, on_hedge=None, **kwargs):
+        """
+        Runs a model call on the pool and waits for its result. The overall wait after
+        admission is bounded by `timeout` per attempt (including backoff) and raises
+        LLMTimeoutError. `priority`, `tokens` (an estimate of the request size) and
+        `on_wait(position, eta_seconds)` are passed to the scheduler. With a `deadline`
+        (seconds, admission included) the call is hedged after `hedge_after` seconds
+        (calling `on_hedge()`) and raises LLMDeadlineError when the deadline passes
+        (QueueTimeoutError if it passes before admission; both count as deadline misses).
+        """
+        retries = self.retries if retries is None else retries
+        timeout = self.timeout if timeout is None else timeout
+        if deadline is not None:
+            return self._run_hedged(fn, args, kwargs, retries, priority, tokens, on_wait, deadline, hedge_after, on_hedge)
+        future = self.submit(fn, *args, retries=retries, priority=priority, tokens=tokens, on_wait=on_wait, **kwargs)
+        try:
+            return future.result(timeout=timeout * (retries + 1) + BACKOFF_MAX * retries)
+        except FutureTimeoutError:
+            future.cancel()
+            self._count("timeouts")
+            raise LLMTimeoutError(f"Model call did not finish within {timeout:g}s") from None
+
+    def _run_hedged(self, fn, args, kwargs, retries, priority, tokens, on_wait, deadline, hedge_after, on_hedge):
+        started = time.monotonic()
+        end = started + deadline
+        cancelled = threading.Event() # Set once the caller stops waiting, so leftover attempts are not sent
+        self._admit_within(deadline, priority, tokens, on_wait)
+        self._count("submitted")
+        primary = self._pool.submit(
+            self._run_with_retries, fn, args, kwargs, retries, priority, tokens, True, end, cancelled
+        )
+        pending, hedged, error = {primary}, hedge_after is None, None
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= end:
+                    break
+                done, pending = wait(pending, timeout=(end if hedged else min(end, started + hedge_after)) - now,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is not primary:
+                            self._count("hedge_wins")
+                        return future.result()
+                    error = future.exception()
+                    if self._fails_every_attempt(error):
+                        raise error
+                if not hedged and (not pending or time.monotonic() >= started + hedge_after):
+                    # Slow or failed transiently: race a duplicate, admitted on the pool within the time left
+                    hedged = True
+                    if self._can_hedge():
+                        self._count("hedges")
+                        if on_hedge is not None:
+                            on_hedge()
+                        self._count("submitted")
+                        pending.add(self._pool.submit(
+                            self._run_with_retries, fn, args, kwargs, retries, priority, tokens, False, end, cancelled
+                        ))
+                if not pending:
+                    raise error
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+        self._count("deadline_misses")
+        raise LLMDeadlineError(f"Model call missed its {deadline:g}s deadline")
+
+    def stream(self, fn, *args, timeout=None, retries=None, priority=PRIORITY_NORMAL, tokens=0, on_wait=None,
+               deadline=None, hedge_after=None, on_hedge=None, on_done=None, **kwargs):
+        """
+        Runs a streaming model call on the pool and yields its text chunks as they
+        arrive. Only the initial request is retried; each chunk must arrive within
+        `timeout` seconds or LLMTimeoutError is raised. With a `deadline`, a duplicate
+        stream is started if no chunk has arrived after `hedge_after` seconds (the first
+        to produce text is followed, the other stopped), and LLMDeadlineError is raised
+        if the stream has not finished by the deadline. `on_done(chunk)` is called with the
+        last chunk of the stream that was followed (it carries the usage metadata).
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        chunks = queue.Queue()
+        abandoned = set() # Attempts whose output is no longer wanted
+
+        def produce(attempt, admitted):
+            try:
+                if not admitted:
+                    self.admit(priority, tokens, timeout=None if end is None else max(0.0, end - time.monotonic()))
+                if attempt in abandoned:
+                    return # Admitted after the caller stopped waiting for it
+                last = None
+                for chunk in self._run_with_retries(fn, args, kwargs, retries, priority, tokens, True, end):
+                    if attempt in abandoned:
+                        return
+                    last = chunk
+                    try:
+                        chunks.put((attempt, "text", chunk.text))
+                    except ValueError: # Chunks without text parts (e.g. a bare finish reason)
+                        continue
+                chunks.put((attempt, "done", last))
+            except Exception as e:
+                chunks.put((attempt, "error", e))
+
+        started = time.monotonic()
+        end = started + deadline if deadline is not None else None
+        self._admit_within(deadline, priority, tokens, on_wait)
+        self._count("submitted")
+        self._pool.submit(produce, 0, True)
+        running, winner, last_chunk = {0}, None, time.monotonic()
+        hedge_at = started + hedge_after if deadline is not None and hedge_after is not None else None
+        try:
+            while True:
+                now = time.monotonic()
+                wake = min(t for t in (last_chunk + timeout, end, hedge_at if winner is None else None) if t is not None)
+                try:
+                    attempt, kind, value = chunks.get(timeout=max(0.0, wake - now))
+                except queue.Empty:
+                    now = time.monotonic()
+                    if end is not None and now >= end:
+                        self._count("deadline_misses")
+                        raise LLMDeadlineError(f"Streamed model call missed its {deadline:g}s deadline") from None
+                    if hedge_at is not None and winner is None and now >= hedge_at:
+                        hedge_at = None
+                        if self._can_hedge():
+                            self._hedge_stream(produce, running, on_hedge)
+                        continue
+                    if now >= last_chunk + timeout:
+                        self._count("timeouts")
+                        raise LLMTimeoutError(f"No streamed output within {timeout:g}s") from None
+                    continue
+                if attempt in abandoned:
+                    continue
+                last_chunk = time.monotonic()
+                if kind == "error":
+                    running.discard(attempt)
+                    if self._fails_every_attempt(value):
+                        raise value
+                    if winner is None and running:
+                        continue # The other attempt may still answer
+                    if winner is None and hedge_at is not None and self._can_hedge():
+                        hedge_at = None # Failed transiently before the hedge point: retry as a hedge right away
+                        self._hedge_stream(produce, running, on_hedge)
+                        continue
+                    raise value
+                if winner is None:
+                    winner = attempt
+                    abandoned.update(running - {attempt})
+                    if attempt != 0:
+                        self._count("hedge_wins")
+                if kind == "done":
+                    if on_done is not None:
+                        on_done(value)
+                    return
+                yield value
+        finally:
+            abandoned.update(running) # Stop whatever is still streaming when the caller gives up
+
+    def _hedge_stream(self, produce, running, on_hedge):
+        attempt = max(running, default=0) + 1
+        running.add(attempt)
+        self._count("hedges")
+        self._count("submitted")
+        if on_hedge is not None:
+            on_hedge()
+        self._pool.submit(produce, attempt, False)
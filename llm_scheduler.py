@@ -0,0 +1,199 @@
+"""
+Process-wide, quota-aware admission control for model calls.
+
+Every call waits for a slot from one `RequestScheduler` before it is sent. Slots
+are granted from two token buckets that mirror the project's quota, requests per
+minute (RPM) and tokens per minute (TPM), strictly in priority order: the final
+assessment and the first technical questions go ahead of extraction, which
+goes ahead of follow-ups. Waiting callers get their queue position and an
+estimated wait so the UI can say so instead of failing.
+
+When the API still answers 429 / ResourceExhausted, `report_rate_limited()`
+pauses all admissions for the server's suggested retry delay (or an exponential
+backoff), so a burst drains at the rate the quota allows instead of erroring.
+"""
+import heapq
+import itertools
+import re
+import threading
+import time
+
+PRIORITY_HIGH = 0  # Final assessment, first questions
+PRIORITY_NORMAL = 1  # Extraction
+PRIORITY_LOW = 2  # Follow-up questions
+
+# Priority class per call type
+DEFAULT_PRIORITIES = {
+    "assessment": PRIORITY_HIGH,
+    "tech_questions": PRIORITY_HIGH,
+    "intake": PRIORITY_HIGH,  # Combined extraction + first questions
+    "extraction": PRIORITY_NORMAL,
+    "follow_up": PRIORITY_LOW,
+    "speculative_assessment": PRIORITY_LOW,  # Nobody is waiting for it yet
+}
+
+DEFAULT_QUEUE_TIMEOUT = 120.0  # Seconds a call may wait for admission
+POLL_INTERVAL = 0.5  # Seconds between queue position updates
+BACKOFF_BASE = 2.0  # Seconds paused after a 429 without a suggested delay; doubled on repeats
+BACKOFF_MAX = 60.0
+CHARS_PER_TOKEN = 4  # Rough average for Gemini tokenization of English/code text
+
+_RETRY_DELAY_PATTERN = re.compile(r"retry in (\d+(?:\.\d+)?)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE)
+
+
+class QueueTimeoutError(Exception):
+    """Raised when a call is not admitted within the queue timeout."""
+
+
+def retry_after_seconds(error):
+    """The retry delay a rate-limit error suggests ("Please retry in 13.5s", "retry_delay { seconds: 13 }")."""
+    match = _RETRY_DELAY_PATTERN.search(str(error))
+    return float(match.group(1) or match.group(2)) if match else None
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate, used to charge the TPM bucket before a call is sent."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to one minute's worth of `per_minute`."""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` (capped at the capacity) is available."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount, now):
+        """Removes `amount`; oversized requests leave the bucket in debt."""
+        self._refill(now)
+        self.level -= amount
+
+    def drain(self, now):
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class RequestScheduler:
+    """Priority queue in front of RPM/TPM token buckets, shared by every session."""
+
+    def __init__(self, rpm=None, tpm=None, queue_timeout=DEFAULT_QUEUE_TIMEOUT, priorities=None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.queue_timeout = queue_timeout
+        self.priorities = dict(DEFAULT_PRIORITIES, **(priorities or {}))
+        self._cond = threading.Condition()
+        self._waiting = []  # Heap of (priority, ticket number)
+        self._tickets = itertools.count()
+        self._paused_until = 0.0
+        self._backoff = BACKOFF_BASE
+        self.counters = {"admitted": 0, "queued": 0, "rate_limited": 0, "queue_timeouts": 0, "max_queue": 0}
+
+    def priority(self, call_type):
+        return self.priorities.get(call_type, PRIORITY_NORMAL)
+
+    def _wait_time(self, tokens, now):
+        wait = self._paused_until - now
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return max(0.0, wait)
+
+    def _eta(self, position, wait):
+        """Rough wait estimate for the caller at `position`: its own wait plus one request interval per caller ahead."""
+        interval = 1 / self.requests.rate if self.requests is not None else 0.0
+        return wait + (position - 1) * interval
+
+    def _leave(self, ticket):
+        self._waiting.remove(ticket)
+        heapq.heapify(self._waiting)
+        self._cond.notify_all()
+
+    def acquire(self, priority=PRIORITY_NORMAL, tokens=0, on_wait=None, timeout=None):
+        """
+        Blocks until this call may be sent. Higher-priority (lower number) callers and
+        earlier callers of the same priority go first. While waiting, `on_wait(position,
+        eta_seconds)` is called from this thread about every POLL_INTERVAL seconds.
+        Raises QueueTimeoutError after `timeout` (default: the queue timeout).
+        """
+        timeout = self.queue_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+        queued = False
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    wait = self._wait_time(tokens, now) if self._waiting[0] == ticket else POLL_INTERVAL
+                    if self._waiting[0] == ticket and wait <= 0:
+                        heapq.heappop(self._waiting)
+                        if self.requests is not None:
+                            self.requests.take(1, now)
+                        if self.tokens is not None:
+                            self.tokens.take(tokens, now)
+                        self.counters["admitted"] += 1
+                        self._cond.notify_all()
+                        return
+                    if now >= deadline:
+                        self.counters["queue_timeouts"] += 1
+                        raise QueueTimeoutError(f"Model request queue busy: not admitted within {timeout:g}s")
+                    if not queued:
+                        queued = True
+                        self.counters["queued"] += 1
+                    self.counters["max_queue"] = max(self.counters["max_queue"], len(self._waiting))
+                    position = sorted(self._waiting).index(ticket) + 1
+                    eta = self._eta(position, wait)
+                if on_wait is not None:
+                    on_wait(position, eta)
+                with self._cond:
+                    self._cond.wait(min(wait, POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+        except BaseException:
+            with self._cond:
+                if ticket in self._waiting:
+                    self._leave(ticket)
+            raise
+
+    def report_rate_limited(self, error=None):
+        """Pauses all admissions after a 429, for the suggested retry delay or an exponential backoff."""
+        delay = retry_after_seconds(error) if error is not None else None
+        with self._cond:
+            now = time.monotonic()
+            if delay is None:
+                delay = self._backoff
+                self._backoff = min(self._backoff * 2, BACKOFF_MAX)
+            self._paused_until = max(self._paused_until, now + delay)
+            if self.requests is not None:
+                self.requests.drain(now)  # Resume at the sustained rate, not with a burst
+            self.counters["rate_limited"] += 1
+
+    def report_success(self):
+        """Resets the 429 backoff after a successful call."""
+        with self._cond:
+            self._backoff = BACKOFF_BASE
+
+    def charge(self, tokens):
+        """Corrects the TPM bucket once a call's real size is known (negative amounts refund)."""
+        if self.tokens is None or not tokens:
+            return
+        with self._cond:
+            self.tokens.take(tokens, time.monotonic())
+            self.tokens.level = min(self.tokens.level, self.tokens.capacity)
+            self._cond.notify_all()
+
+    def queue_length(self):
+        with self._cond:
+            return len(self._waiting)
@@ -0,0 +1,169 @@
+"""
+Lightweight in-process metrics: timing spans, counters and latency histograms.
+
+    metrics = Metrics()
+    with metrics.span("llm_call", call_type="follow_up") as attributes:
+        ...
+        attributes["prompt_tokens"] = 412
+    metrics.count("llm_prompt_tokens", 412, call_type="follow_up")
+
+Observations aggregate into fixed-bucket histograms (per metric name and label
+set) that can be exported in the Prometheus text exposition format or summarized
+as percentiles, and each one can also be appended to a JSONL log for offline
+analysis. Span attributes only go into the log, so they do not split histograms.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+PREFIX = "talentscout"
+
+
+class Histogram:
+    """Per-bucket (non-cumulative) counts plus count, sum and max for one label set."""
+    __slots__ = ("bounds", "buckets", "count", "sum", "max")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.buckets = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimated q-quantile, interpolating linearly inside the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for bound, n in zip(self.bounds, self.buckets):
+            if n and seen + n >= rank:
+                upper = self.max if math.isinf(bound) else min(bound, self.max)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = bound
+        return self.max
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Metrics:
+    """Thread-safe registry of histograms (durations) and counters (e.g. tokens)."""
+
+    def __init__(self, log_path=None):
+        self._lock = threading.Lock()
+        self.histograms = {}  # (name, label_key) -> Histogram
+        self.counters = {}  # (name, label_key) -> float
+        self._log = open(log_path, "a", encoding="utf-8", buffering=1) if log_path else None
+
+    def _write_log(self, kind, name, labels, value, attributes=None):
+        if self._log is not None:
+            entry = {"ts": round(time.time(), 3), "kind": kind, "metric": name, "labels": labels, "value": value}
+            if attributes:
+                entry["attributes"] = attributes
+            self._log.write(json.dumps(entry) + "\n")
+
+    def observe(self, name, seconds, attributes=None, **labels):
+        """Records one duration (in seconds) for `name`; `attributes` are only logged."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+            self._write_log("span", name, labels, round(seconds, 6), attributes)
+
+    def count(self, name, value=1, **labels):
+        """Adds `value` to the counter `name`."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            self._write_log("count", name, labels, value)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        Times the enclosed block; the duration is recorded even if it raises. The block
+        gets a dict to fill with attributes of this one span (e.g. token counts).
+        """
+        started = time.perf_counter()
+        attributes = {}
+        try:
+            yield attributes
+        finally:
+            self.observe(name, time.perf_counter() - started, attributes, **labels)
+
+    def summary(self):
+        """[{"metric", "labels", "count", "mean", "p50", "p95", "max"}] for every histogram, in seconds."""
+        with self._lock:
+            return [
+                {
+                    "metric": name,
+                    "labels": dict(label_key),
+                    "count": h.count,
+                    "mean": h.sum / h.count if h.count else 0.0,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "max": h.max,
+                }
+                for (name, label_key), h in sorted(self.histograms.items())
+            ]
+
+    def counter_values(self):
+        with self._lock:
+            return {(name, label_key): value for (name, label_key), value in self.counters.items()}
+
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.histograms}):
+                metric = f"{PREFIX}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for (hist_name, label_key), h in sorted(self.histograms.items()):
+                    if hist_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, n in zip(h.bounds, h.buckets):
+                        cumulative += n
+                        le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                        lines.append(f"{metric}_bucket{_format_labels(label_key, [('le', le)])} {cumulative}")
+                    lines.append(f"{metric}_sum{_format_labels(label_key)} {h.sum:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(label_key)} {h.count}")
+            for name in sorted({name for name, _ in self.counters}):
+                metric = f"{PREFIX}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (counter_name, label_key), value in sorted(self.counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{metric}{_format_labels(label_key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically writes the Prometheus text export to `path` (e.g. for node_exporter's textfile collector)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
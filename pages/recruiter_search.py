@@ -0,0 +1,110 @@
+import streamlit as st
+import os
+import time
+from datetime import datetime
+from screening_index import ScreeningIndex
+
+# --- Page Configuration ---
+st.set_page_config(
+    page_title="TalentScout – Recruiter Search",
+    page_icon="🔎",
+    layout="wide"
+)
+
+# --- Access Control ---
+def get_secret(name):
+    """Reads a Streamlit secret, treating a missing secrets.toml like a missing key."""
+    try:
+        return st.secrets.get(name)
+    except Exception:
+        return None
+
+# Candidates use the same app, so this page is only available with a recruiter key
+recruiter_key = os.getenv("TALENTSCOUT_RECRUITER_KEY") or get_secret("recruiter_key")
+if not recruiter_key:
+    st.info("Recruiter search is disabled. Set `recruiter_key` in `.streamlit/secrets.toml` or the `TALENTSCOUT_RECRUITER_KEY` environment variable to enable it.")
+    st.stop()
+if st.session_state.get("recruiter_key") != recruiter_key:
+    entered = st.text_input("Recruiter key", type="password")
+    if entered != recruiter_key:
+        if entered:
+            st.error("Invalid recruiter key.")
+        st.stop()
+    st.session_state.recruiter_key = entered
+
+@st.cache_resource
+def get_screening_index():
+    """Recruiter search index of completed screenings, shared by every browser session."""
+    return ScreeningIndex()
+
+index = get_screening_index()
+
+# --- Filters ---
+st.markdown("## 🔎 Recruiter Search")
+st.caption(f"{index.count()} completed screenings indexed")
+
+with st.form("search_form"):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        tech = st.text_input("Tech stack (all of, comma-separated)", placeholder="Python, SQL")
+        location = st.text_input("Location", placeholder="Berlin")
+    with col2:
+        years = st.slider("Years of experience", 0, 30, (0, 30))
+        position = st.text_input("Desired position", placeholder="Backend Engineer")
+    with col3:
+        score = st.slider("Assessment score", 1.0, 5.0, (1.0, 5.0), step=0.5)
+        text = st.text_input("Assessment contains", placeholder="scalability")
+    unscored = st.checkbox("Include screenings without a score or stated experience", value=True)
+    st.form_submit_button("Search", use_container_width=True)
+
+# --- Results ---
+# Slider bounds left at their extremes mean "no filter", so unscored screenings can still match
+filters = {
+    "tech": [tech] if tech.strip() else [],
+    "min_years": years[0] if years[0] > 0 or not unscored else None,
+    "max_years": years[1] if years[1] < 30 else None,
+    "location": location,
+    "position": position,
+    "min_score": score[0] if score[0] > 1.0 or not unscored else None,
+    "max_score": score[1] if score[1] < 5.0 else None,
+    "text": text,
+}
+
+started = time.perf_counter()
+try:
+    results = index.search(**filters, limit=200)
+except Exception as e:
+    st.error(f"Invalid search: {e}")
+    st.stop()
+elapsed_ms = (time.perf_counter() - started) * 1000
+
+st.markdown(f"**{len(results)}** matches in {elapsed_ms:.1f} ms")
+if results:
+    st.dataframe(
+        [
+            {
+                "Name": r["full_name"],
+                "Email": r["email"],
+                "Tech Stack": r["tech_stack"],
+                "Years": r["years"],
+                "Position": r["position"],
+                "Location": r["location"],
+                "Score": r["score"],
+                "Completed": datetime.fromtimestamp(r["completed_at"]).strftime("%Y-%m-%d %H:%M"),
+                "Session": r["session_id"],
+            }
+            for r in results
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
+    # Full assessment for one selected screening
+    selected = st.selectbox(
+        "Show assessment for:",
+        [r["session_id"] for r in results],
+        format_func=lambda sid: next(f'{r["full_name"] or "Unknown"} ({sid[:8]})' for r in results if r["session_id"] == sid)
+    )
+    record = index.get(selected)
+    if record:
+        st.markdown(record["assessment"])
@@ -0,0 +1,363 @@
+"""
+Persistent bank of technical questions, indexed by normalized tech stack token.
+
+Questions are stored with the stack tokens they are for. When a candidate
+arrives, vetted questions (imported as curated, or generated ones a reviewer has
+approved) are retrieved locally by TF-IDF relevance to their stack tokens (rare
+technologies weigh more than ubiquitous ones) and assembled so each technology is
+covered; the model is only asked about the technologies the bank cannot cover yet.
+Generated questions are banked as review candidates and never served to another
+candidate until approved.
+
+Near-duplicate questions are dropped before they enter the bank: each question
+gets a MinHash signature over its word shingles, and locality-sensitive hashing
+of signature bands finds the few existing questions worth comparing against.
+
+Usage:
+    python question_bank.py import curated_questions.json --tech "python, django"
+    python question_bank.py show python sql
+    python question_bank.py review             # generated questions awaiting approval
+    python question_bank.py approve 12 15
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from screening import QUESTION_NUMBER_PATTERN, tech_stack_tokens, template_questions
+
+DEFAULT_BANK_PATH = os.getenv("TALENTSCOUT_QUESTION_BANK", "question_bank.db")
+MIN_QUESTIONS = 3
+MAX_QUESTIONS = 5
+SERVED_SOURCES = ("curated", "approved") # Vetted questions; "generated" ones wait for review
+
+NUM_HASHES = 64
+BANDS = 16  # NUM_HASHES / BANDS rows per band; candidates above ~0.5 similarity share a band
+DUPLICATE_SIMILARITY = 0.8  # Estimated Jaccard similarity at which two questions are the same
+_MERSENNE_PRIME = (1 << 61) - 1
+_HASH_PARAMS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME | 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME)
+    for i in range(NUM_HASHES)
+]
+_WORD_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    language TEXT NOT NULL,
+    question TEXT NOT NULL,
+    follow_ups TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    source TEXT NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS question_tech (
+    token TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    PRIMARY KEY (token, question_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS question_bands (
+    band INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    PRIMARY KEY (band, hash, question_id)
+) WITHOUT ROWID;
+"""
+
+
+def _shingles(text):
+    """Word bigrams of the normalized question text (single words for one-word text)."""
+    words = _WORD_PATTERN.findall(QUESTION_NUMBER_PATTERN.sub("", text.lower()))
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(text):
+    """MinHash signature (NUM_HASHES ints) of a question's shingles."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+        for s in _shingles(text)
+    ] or [0]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _HASH_PARAMS]
+
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(x == y for x, y in zip(signature_a, signature_b)) / NUM_HASHES
+
+
+def _bands(signature):
+    rows = NUM_HASHES // BANDS
+    return [
+        (band, hashlib.blake2b(json.dumps(signature[band * rows:(band + 1) * rows]).encode(), digest_size=8).hexdigest())
+        for band in range(BANDS)
+    ]
+
+
+def dedupe(questions):
+    """Drops questions that are near-duplicates of an earlier one in the same list."""
+    kept, signatures = [], []
+    for item in questions:
+        signature = minhash(item["question"])
+        if all(similarity(signature, other) < DUPLICATE_SIMILARITY for other in signatures):
+            kept.append(item)
+            signatures.append(signature)
+    return kept
+
+
+def tag_tokens(question, tokens):
+    """The stack tokens a generated question is about: those it names, or all of them if it names none."""
+    text = question.lower()
+    named = [t for t in tokens if re.search(r"(?<![a-z0-9])" + re.escape(t) + r"(?![a-z0-9])", text)]
+    return named or list(tokens)
+
+
+class QuestionBank:
+    """SQLite-backed question bank with TF-IDF retrieval and MinHash deduplication."""
+
+    def __init__(self, path=DEFAULT_BANK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _find_duplicate(self, language, signature):
+        candidates = set()
+        for band, band_hash in _bands(signature):
+            candidates.update(row[0] for row in self._conn.execute(
+                "SELECT question_id FROM question_bands WHERE band = ? AND hash = ?", (band, band_hash)
+            ))
+        for question_id in candidates:
+            row = self._conn.execute(
+                "SELECT signature FROM questions WHERE id = ? AND language = ?", (question_id, language)
+            ).fetchone()
+            if row and similarity(signature, json.loads(row[0])) >= DUPLICATE_SIMILARITY:
+                return question_id
+        return None
+
+    def add(self, questions, tokens, language="English", source="generated"):
+        """
+        Adds [{"question", "follow_ups"}] generated for the stack `tokens`, skipping
+        near-duplicates of questions already in the bank (or earlier in the batch).
+        Returns the number of questions added.
+        """
+        added = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for item in questions:
+                    signature = minhash(item["question"])
+                    if self._find_duplicate(language, signature) is not None:
+                        continue
+                    question_id = self._conn.execute(
+                        "INSERT INTO questions (language, question, follow_ups, signature, source, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (language, QUESTION_NUMBER_PATTERN.sub("", item["question"]).strip(),
+                         json.dumps(item.get("follow_ups", []), ensure_ascii=False),
+                         json.dumps(signature), source, time.time()),
+                    ).lastrowid
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO question_tech (token, question_id) VALUES (?, ?)",
+                        [(token, question_id) for token in tag_tokens(item["question"], tokens)],
+                    )
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO question_bands (band, hash, question_id) VALUES (?, ?, ?)",
+                        [(band, band_hash, question_id) for band, band_hash in _bands(signature)],
+                    )
+                    added += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def retrieve(self, tokens, language="English", max_questions=MAX_QUESTIONS):
+        """
+        Assembles up to `max_questions` vetted bank questions for a stack. Tokens are served
+        round-robin, rarest (highest IDF) first, each with its most relevant unused
+        question (TF-IDF over the question's tags, least-served first on ties).
+        Returns (questions, uncovered_tokens).
+        """
+        tokens = list(tokens)
+        if not tokens:
+            return [], []
+        placeholders = ", ".join("?" * len(tokens))
+        sources = ", ".join("?" * len(SERVED_SOURCES))
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM questions WHERE language = ? AND source IN ({sources})",
+                (language, *SERVED_SOURCES),
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT q.id, q.question, q.follow_ups, q.uses, t.token FROM question_tech t "
+                f"JOIN questions q ON q.id = t.question_id "
+                f"WHERE t.token IN ({placeholders}) AND q.language = ? AND q.source IN ({sources})",
+                tokens + [language, *SERVED_SOURCES],
+            ).fetchall()
+
+        by_token, info = {}, {}
+        for question_id, question, follow_ups, uses, token in rows:
+            by_token.setdefault(token, []).append(question_id)
+            info.setdefault(question_id, {"question": question, "follow_ups": json.loads(follow_ups),
+                                          "uses": uses, "tokens": set()})["tokens"].add(token)
+        idf = {token: math.log((1 + total) / (1 + len(ids))) + 1 for token, ids in by_token.items()}
+        for item in info.values():
+            item["score"] = sum(idf[token] for token in item["tokens"])
+        for ids in by_token.values():
+            ids.sort(key=lambda qid: (-info[qid]["score"], info[qid]["uses"], qid))
+
+        chosen = []
+        order = sorted(by_token, key=lambda token: -idf[token])
+        while len(chosen) < max_questions and any(by_token[token] for token in order):
+            for token in order:
+                while by_token[token] and by_token[token][0] in chosen:
+                    by_token[token].pop(0)
+                if by_token[token] and len(chosen) < max_questions:
+                    chosen.append(by_token[token].pop(0))
+
+        uncovered = [token for token in tokens if token not in by_token]
+        return [{"id": qid, "question": info[qid]["question"], "follow_ups": info[qid]["follow_ups"]}
+                for qid in chosen], uncovered
+
+    def mark_used(self, question_ids):
+        """Counts a serving of each question so later retrievals rotate through the bank."""
+        with self._lock:
+            self._conn.executemany("UPDATE questions SET uses = uses + 1 WHERE id = ?", [(i,) for i in question_ids])
+
+    def pending_review(self, language=None):
+        """Generated questions awaiting approval as (id, question, tokens), oldest first."""
+        query = ("SELECT q.id, q.question, GROUP_CONCAT(t.token, ', ') FROM questions q "
+                 "LEFT JOIN question_tech t ON t.question_id = q.id WHERE q.source = 'generated'")
+        params = ()
+        if language is not None:
+            query += " AND q.language = ?"
+            params = (language,)
+        with self._lock:
+            return self._conn.execute(query + " GROUP BY q.id ORDER BY q.id", params).fetchall()
+
+    def approve(self, question_ids):
+        """Marks generated questions as vetted, so they are served from the bank. Returns how many changed."""
+        with self._lock:
+            return sum(
+                self._conn.execute(
+                    "UPDATE questions SET source = 'approved' WHERE id = ? AND source = 'generated'", (i,)
+                ).rowcount
+                for i in question_ids
+            )
+
+    def count(self, language=None):
+        with self._lock:
+            if language is None:
+                return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM questions WHERE language = ?", (language,)).fetchone()[0]
+
+
+def _tokens_to_generate(tokens, banked, uncovered, min_questions):
+    """What to ask the model about: nothing when the bank covers the stack, else the gaps or all of it."""
+    if not tokens or (not uncovered and len(banked) >= min_questions):
+        return []
+    # Too little in the bank for this stack: generate for all of it, else just the gaps
+    return uncovered if len(banked) >= min_questions - 1 and uncovered else tokens
+
+
+def tokens_to_generate(bank, tech_stack, language, min_questions=MIN_QUESTIONS, max_questions=MAX_QUESTIONS):
+    """
+    The technologies `select_questions` will ask the model about for a stack, so a caller
+    can request exactly those questions ahead of time. Empty when the bank covers it.
+    """
+    tokens = tech_stack_tokens(tech_stack)
+    banked, uncovered = bank.retrieve(tokens, language, max_questions)
+    return _tokens_to_generate(tokens, banked, uncovered, min_questions)
+
+
+def select_questions(bank, tech_stack, language, generate, min_questions=MIN_QUESTIONS,
+                     max_questions=MAX_QUESTIONS):
+    """
+    Returns 3-5 [{"question", "follow_ups"}] for a stack. Bank questions are used when
+    they cover every technology and there are enough of them; otherwise
+    `generate(stack_text)` (a list of the same dicts) is asked only about the
+    uncovered technologies, or the whole stack if the bank has too little, and the
+    new questions are deduplicated into the bank as review candidates.
+    """
+    tokens = tech_stack_tokens(tech_stack)
+    banked, uncovered = bank.retrieve(tokens, language, max_questions)
+    ask_tokens = _tokens_to_generate(tokens, banked, uncovered, min_questions)
+    if not ask_tokens:
+        bank.mark_used([q["id"] for q in banked])
+        return [{"question": q["question"], "follow_ups": q["follow_ups"]} for q in banked]
+
+    generated = dedupe(generate(", ".join(ask_tokens)))
+    bank.add(generated, ask_tokens, language)
+
+    if ask_tokens is tokens:
+        return generated[:max_questions]
+
+    # Generated questions cover the gaps; banked ones keep the covered technologies
+    n_generated = min(len(generated), max(max_questions - len(banked), len(uncovered), 1))
+    fill = banked[:max_questions - n_generated]
+    bank.mark_used([q["id"] for q in fill])
+    return [{"question": q["question"], "follow_ups": q["follow_ups"]} for q in fill] + generated[:n_generated]
+
+
+def fallback_questions(bank, tech_stack, language, min_questions=MIN_QUESTIONS, max_questions=MAX_QUESTIONS):
+    """
+    Questions for a stack without calling the model (used when it misses its deadline):
+    whatever the bank has for it, topped up with template questions for the
+    technologies the bank does not cover.
+    """
+    tokens = tech_stack_tokens(tech_stack)
+    banked, uncovered = bank.retrieve(tokens, language, max_questions)
+    bank.mark_used([q["id"] for q in banked])
+    questions = [{"question": q["question"], "follow_ups": q["follow_ups"]} for q in banked]
+    missing = max(min_questions - len(questions), min(len(uncovered), max_questions - len(questions)))
+    # Template questions name each technology the way the candidate wrote it
+    names = {item.strip().lower(): item.strip() for item in tech_stack.replace(";", ",").split(",") if item.strip()}
+    return questions + template_questions([names.get(t, t) for t in uncovered or tokens], missing)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the TalentScout question bank.")
+    parser.add_argument("--bank", default=DEFAULT_BANK_PATH, help="question bank database")
+    parser.add_argument("--language", default="English")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="add curated questions from a JSON file")
+    importer.add_argument("file", help='JSON array of {"question": ..., "follow_ups": [...]}')
+    importer.add_argument("--tech", required=True, help="tech stack the questions are for")
+    show = commands.add_parser("show", help="print the questions the bank would serve for a stack")
+    show.add_argument("tech", nargs="+")
+    commands.add_parser("review", help="list generated questions awaiting approval")
+    approve = commands.add_parser("approve", help="serve reviewed generated questions from the bank")
+    approve.add_argument("ids", nargs="+", type=int, help="question IDs from `review`")
+    args = parser.parse_args(argv)
+
+    bank = QuestionBank(args.bank)
+    if args.command == "import":
+        with open(args.file, "r", encoding="utf-8") as f:
+            questions = json.load(f)
+        added = bank.add(questions, tech_stack_tokens(args.tech), args.language, source="curated")
+        print(f"Added {added} of {len(questions)} questions ({bank.count(args.language)} in bank)")
+    elif args.command == "review":
+        for question_id, question, tokens in bank.pending_review(args.language):
+            print(f"[{question_id}] ({tokens}) {question}")
+    elif args.command == "approve":
+        print(f"Approved {bank.approve(args.ids)} of {len(args.ids)} questions")
+    else:
+        questions, uncovered = bank.retrieve(tech_stack_tokens(", ".join(args.tech)), args.language)
+        for i, q in enumerate(questions):
+            print(f"{i+1}. {q['question']}")
+        if uncovered:
+            print(f"Not covered: {', '.join(uncovered)}")
+
+
+if __name__ == "__main__":
+    main()
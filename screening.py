@@ -0,0 +1,376 @@
+"""
+Screening pipeline logic shared by the Streamlit app and the headless batch CLI:
+prompt builders, response parsers and the answer/assessment helpers. Nothing in
+here touches `st.session_state`; callers pass in the values they hold.
+"""
+import json
+import re
+
+import answer_scorer
+
+# Patterns compiled once at import instead of on every call
+QUESTION_NUMBER_PATTERN = re.compile(r"^\d+\.\s*") # "1. " prefix of a numbered question
+_STACK_SEPARATOR_PATTERN = re.compile(r"[,;/\n]")
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+_JSON_BLOCK_PATTERN = re.compile(r"```json\n(.*?)```", re.DOTALL)
+_CODE_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+_PARTIAL_QUESTION_PATTERN = re.compile(r'"question"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_CONTENT_TERM_PATTERN = re.compile(r"[a-z][a-z0-9+#.\-]{3,}")
+
+# This concluding message is static, consider adding translations for it.
+ASSESSMENT_TEMPLATE = """
+🎯 Technical Assessment for {name}:
+{assessment}
+
+Thank you for your time! We'll be in touch within 5-7 business days.
+"""
+
+
+def tech_stack_tokens(tech_stack):
+    """Normalizes a tech stack string into sorted, lower-cased, de-duplicated tokens."""
+    return sorted({t.strip().lower() for t in _STACK_SEPARATOR_PATTERN.split(tech_stack) if t.strip()})
+
+
+def is_substantive_answer(text, question="", tech_stack=""):
+    """
+    Checks if a candidate's answer is good enough to move on without a follow-up,
+    using the local answer-quality scorer (see answer_scorer.py).
+    """
+    return answer_scorer.is_substantive(text, question, tech_stack_tokens(tech_stack))
+
+
+MAX_ANSWER_WORDS = 120  # Per question in the assessment prompt
+MIN_ANSWER_SCORE = 0.15  # Answers below this ("not sure", "short") are left out of the prompt
+
+
+def _compact_answers(answers, question, tokens):
+    """Joins a question's informative answers, dropping repeated sentences and capping the length."""
+    scores = answer_scorer.score_answers(answers, [question] * len(answers), tokens)
+    sentences, seen = [], set()
+    for answer, score in zip(answers, scores):
+        if score < MIN_ANSWER_SCORE:
+            continue
+        for sentence in _SENTENCE_END_PATTERN.split(" ".join(answer.split())):
+            key = sentence.lower().strip(" .!?")
+            if key and key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+    words = " ".join(sentences).split()
+    return " ".join(words[:MAX_ANSWER_WORDS]) + (" …" if len(words) > MAX_ANSWER_WORDS else "")
+
+
+def format_qa_for_assessment(qa_map, tech_stack=""):
+    """
+    Formats the collected questions and answers (QAEntry values) for the final assessment
+    prompt: a locally computed feature summary per question, then the informative part
+    of each answer, deduplicated and capped at MAX_ANSWER_WORDS.
+    """
+    tokens = tech_stack_tokens(tech_stack)
+    entries = list(qa_map.values())
+    qa_text = "\n".join(
+        f"Question {i+1}: {qa.question}\nAnswer: {_compact_answers(qa.answers, qa.question, tokens) or '(no substantive answer)'}\n"
+        for i, qa in enumerate(entries)
+    )
+    return f"Answer quality features (local scoring):\n{answer_scorer.feature_summary(entries, tokens)}\n\n{qa_text}"
+
+
+def build_extraction_prompt(user_input, fields, language="English"):
+    """Prompt asking the model to extract only `fields` from free-form intake text."""
+    fields_template = ",\n".join(f'            "{field}": "..."' for field in fields)
+    return f"""
+        Extract the following from: {user_input}
+        Provide as JSON with these fields (use "N/A" if unknown):
+        {{
+{fields_template}
+        }}
+
+        All responses, including confirmations or requests for clarification, MUST be exclusively in {language}.
+        """
+
+
+def parse_extraction_response(text):
+    """Returns the dict inside the ```json block of an extraction response, or None if there is none."""
+    json_match = _JSON_BLOCK_PATTERN.search(text)
+    if not json_match:
+        return None
+    return json.loads(json_match.group(1))
+
+
+QUESTION_REQUIREMENTS = """
+    - Each question should test practical, hands-on knowledge.
+    - Include at least one question about system design.
+    - Include at least one question about debugging/optimization.
+    - Questions should require detailed explanations, not just yes/no answers.
+    - Avoid generic "what is" questions.
+    - For each question, also write 1-2 short follow-up questions (1-2 sentences each) to ask if the
+      candidate's answer is too brief. They should ask for specific examples or implementation details."""
+
+
+def build_tech_questions_prompt(tech_stack, language="English"):
+    """
+    Prompt asking for 3-5 practical technical questions for a tech stack, each with
+    prepared follow-ups to use when the candidate's answer is too brief.
+    """
+    return f"""
+    Generate 3-5 technical questions for a candidate with this tech stack: {tech_stack}
+    Requirements:{QUESTION_REQUIREMENTS}
+    - Return ONLY a JSON array in this shape:
+      [{{"question": "...", "follow_ups": ["...", "..."]}}]
+    - All questions and follow-ups MUST be exclusively in {language}.
+    """
+
+
+# --- Local Fallback Content ---
+# Used when the model misses its deadline. English only; consider adding translations.
+TEMPLATE_QUESTIONS = [
+    ("Describe a project where you used {tech} in production. What problem did it solve, and which trade-offs did you make?",
+     ["What would you do differently if you built it again today?"]),
+    ("How would you track down a performance problem in a {tech} application? Walk through the tools and steps you would use.",
+     ["Can you give an example of a bottleneck you found this way and how you fixed it?"]),
+    ("How would you design a service built on {tech} so that it handles ten times its current load?",
+     ["Which part would fail first, and how would you find out before it does?"]),
+    ("How do you test {tech} code, and what does a good test for it look like?",
+     ["How do you keep those tests fast and reliable as the codebase grows?"]),
+    ("What is a common pitfall when working with {tech}, and how do you avoid it?",
+     ["Have you run into it yourself? What happened?"]),
+]
+CANNED_FOLLOW_UPS = [
+    "Could you walk me through a concrete example from a project you worked on?",
+    "Which specific tools, libraries or commands would you use for this, and why?",
+    "What trade-offs or failure cases would you watch out for here?",
+]
+
+
+def template_questions(tokens, count):
+    """`count` generic questions cycling through the stack's technologies, each with a follow-up."""
+    techs = list(tokens) or ["your main programming language"]
+    return [
+        {"question": question.format(tech=techs[i % len(techs)]), "follow_ups": list(follow_ups)}
+        for i, (question, follow_ups) in zip(range(count), TEMPLATE_QUESTIONS)
+    ]
+
+
+def canned_follow_up(asked=0):
+    """A generic follow-up; `asked` (follow-ups already asked for this question) varies it."""
+    return CANNED_FOLLOW_UPS[asked % len(CANNED_FOLLOW_UPS)]
+
+
+# --- Combined Intake (structured output) ---
+def intake_response_schema(fields):
+    """
+    Response schema (the OpenAPI subset Gemini's structured output accepts) for one call
+    returning the candidate `fields` and their technical questions together.
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "candidate": {
+                "type": "object",
+                "properties": {field: {"type": "string"} for field in fields},
+                "required": list(fields),
+            },
+            "questions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "question": {"type": "string"},
+                        "follow_ups": {"type": "array", "items": {"type": "string"}},
+                    },
+                    "required": ["question", "follow_ups"],
+                },
+            },
+        },
+        "required": ["candidate", "questions"],
+    }
+
+
+def build_intake_prompt(user_input, fields, tech_stack=None, language="English"):
+    """
+    Prompt for the combined intake call: extract the candidate `fields` from their
+    message and write the technical questions for their stack in the same response.
+    `tech_stack` is given when it was already resolved locally.
+    """
+    fields_template = ",\n".join(f'            "{field}": "..."' for field in fields)
+    stack = f"this tech stack: {tech_stack}" if tech_stack else "the tech stack you extracted"
+    return f"""
+    A candidate sent this message at the start of a technical screening: {user_input}
+
+    1. Extract these candidate details (use "N/A" if unknown):
+        {{
+{fields_template}
+        }}
+    2. Generate 3-5 technical questions for {stack}.
+    Requirements:{QUESTION_REQUIREMENTS}
+    - Return ONLY JSON in this shape:
+      {{"candidate": {{...the details above...}}, "questions": [{{"question": "...", "follow_ups": ["...", "..."]}}]}}
+    - All questions and follow-ups MUST be exclusively in {language}.
+    """
+
+
+def _validate_questions(items, errors):
+    """Well-formed questions of a structured response; every problem is appended to `errors`."""
+    if not isinstance(items, list):
+        errors.append("questions: not an array")
+        return []
+    questions = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("question"), str) or not item["question"].strip():
+            errors.append(f"questions[{i}]: missing question text")
+            continue
+        follow_ups = item.get("follow_ups", [])
+        if not isinstance(follow_ups, list):
+            errors.append(f"questions[{i}].follow_ups: not an array")
+            follow_ups = []
+        valid_follow_ups = [f.strip() for f in follow_ups if isinstance(f, str) and f.strip()]
+        if len(valid_follow_ups) != len(follow_ups):
+            errors.append(f"questions[{i}].follow_ups: non-text entries dropped")
+        questions.append({
+            "question": QUESTION_NUMBER_PATTERN.sub("", item["question"].strip()), # The app numbers questions itself
+            "follow_ups": valid_follow_ups,
+        })
+    return questions
+
+
+def parse_intake_response(text, fields):
+    """
+    Strictly validates a combined intake response against `intake_response_schema(fields)`.
+    Returns (candidate, questions, errors): the requested fields that came back as text,
+    the well-formed questions, and a description of everything that was dropped, so a
+    response with one bad part still yields the other.
+    """
+    errors = []
+    try:
+        data = json.loads(_CODE_FENCE_PATTERN.sub("", text.strip()))
+    except ValueError as e:
+        return {}, [], [f"not valid JSON: {e}"]
+    if not isinstance(data, dict):
+        return {}, [], ["response: not an object"]
+
+    candidate = {}
+    details = data.get("candidate")
+    if not isinstance(details, dict):
+        errors.append("candidate: missing or not an object")
+        details = {}
+    for field in fields:
+        value = details.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value) # e.g. years of experience as a number
+        if not isinstance(value, str):
+            if field in details:
+                errors.append(f"candidate.{field}: not text")
+            continue
+        if value.strip() and value.strip().lower() != "n/a":
+            candidate[field] = value.strip()
+    errors += [f"candidate.{key}: not requested" for key in details if key not in fields]
+
+    if "questions" not in data:
+        errors.append("questions: missing")
+    questions = _validate_questions(data.get("questions", []), errors)
+    return candidate, questions, errors
+
+
+def parse_tech_questions(text):
+    """Extracts the numbered questions from a plain numbered-list response."""
+    return [q.strip() for q in text.split('\n') if q.strip() and QUESTION_NUMBER_PATTERN.match(q.strip())]
+
+
+def parse_structured_questions(text):
+    """
+    Parses a question-generation response into [{"question": str, "follow_ups": [str]}].
+    Falls back to numbered-line parsing (without follow-ups) if the JSON is unusable.
+    """
+    body = _CODE_FENCE_PATTERN.sub("", text.strip())
+    try:
+        items = json.loads(body)
+        questions = [
+            {
+                "question": str(item["question"]).strip(),
+                "follow_ups": [str(f).strip() for f in item.get("follow_ups", []) if str(f).strip()]
+            }
+            for item in items if isinstance(item, dict) and str(item.get("question", "")).strip()
+        ]
+        if questions:
+            return questions
+    except (ValueError, TypeError):
+        pass
+    return [
+        {"question": QUESTION_NUMBER_PATTERN.sub("", q), "follow_ups": []}
+        for q in parse_tech_questions(text)
+    ]
+
+
+def preview_questions(partial_text):
+    """Human-readable preview of a partially streamed structured question response."""
+    questions = _PARTIAL_QUESTION_PATTERN.findall(partial_text)
+    return "\n".join(f"{i+1}. {q}" for i, q in enumerate(questions))
+
+
+_STOPWORDS = {
+    "about", "after", "also", "because", "been", "could", "does", "from", "have", "into", "just",
+    "like", "more", "much", "really", "should", "some", "that", "their", "then", "there", "they",
+    "this", "using", "what", "when", "where", "which", "will", "with", "would", "your", "know", "sure",
+}
+
+
+def _content_terms(text):
+    return {w for w in _CONTENT_TERM_PATTERN.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def answer_diverges(question, follow_ups, answer, min_new_terms=3):
+    """
+    True when a short answer goes somewhere the prepared follow-ups did not anticipate:
+    it introduces several content terms that appear in neither the question nor its
+    follow-ups, and those new terms make up most of what the candidate said.
+    """
+    answer_terms = _content_terms(answer)
+    new_terms = answer_terms - _content_terms(" ".join([question] + list(follow_ups)))
+    return len(new_terms) >= min_new_terms and len(new_terms) * 2 > len(answer_terms)
+
+
+def build_follow_up_prompt(question, answer, tech_stack, language="English"):
+    """Prompt asking for exactly one targeted follow-up question."""
+    return f"""
+    Based on this technical exchange:
+    Question: "{question}"
+    Answer: "{answer}"
+
+    Generate exactly ONE follow-up question that:
+    1. Targets the most important technical concept from the original question or answer.
+    2. Asks for specific examples or implementation details.
+    3. References these technologies if relevant: {tech_stack}
+    4. Is 1-2 sentences maximum.
+    5. MUST be exclusively in {language}.
+
+    Example formats:
+    - "How would you implement this using [TECH]?"
+    - "What metrics would you use to measure success?"
+    - "How would this approach scale to 1 million users?"
+
+    Make it specific and technical.
+    """
+
+
+def build_assessment_prompt(tech_stack, qa_text, language="English"):
+    """Prompt asking for the final technical assessment of the collected answers."""
+    return f"""
+    Candidate Tech Stack: {tech_stack}
+
+    Questions and Answers:
+    {qa_text}
+
+    Provide a concise technical assessment (3-4 sentences) that:
+    1. Highlights 2 specific strengths demonstrated in the answers.
+    2. Identifies 2 concrete areas for improvement.
+    3. Assesses overall technical competency (1-5 scale).
+    4. Avoids generic statements - be specific to the answers given and Note the overall tone or confidence conveyed in their responses.
+    5. Does not make hiring recommendations.
+    6. All output MUST be exclusively in {language}.
+    7. Treats the answer quality features (0-1, computed locally) as a hint only; judge from the answers themselves.
+    """
+
+
+def first_name(candidate_info):
+    """The candidate's first name for greetings, falling back to "Candidate"."""
+    parts = str(candidate_info.get("Full Name", "Candidate")).split()
+    return parts[0] if parts else "Candidate"
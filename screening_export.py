@@ -0,0 +1,180 @@
+"""
+Incremental export of completed screenings to partitioned Parquet files.
+
+Tails the recruiter search index (screening_index.py) in completion order from a
+checkpoint, joins each screening with its session state (Q/A map, follow-up
+counts, per-stage turn timings) and appends it to
+
+    <out>/date=YYYY-MM-DD/part-<batch position>.parquet
+
+Each run only reads screenings completed after the checkpoint, one batch at a
+time, so memory stays constant however long the history grows. Files are written
+atomically and the checkpoint is advanced after every batch; a run interrupted
+between the two rewrites the same files next time instead of duplicating them.
+
+A screening whose assessment is regenerated is completed again and exported
+again; readers should keep the latest `completed_at` per `session_id`.
+
+Usage:
+    python screening_export.py --out exports/screenings
+    python -c "import pyarrow.dataset as ds; print(ds.dataset('exports/screenings', partitioning='hive').to_table())"
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from screening_index import DEFAULT_INDEX_PATH, ScreeningIndex
+from session_model import InterviewState
+from session_store import DEFAULT_DB_PATH, SessionStore
+
+DEFAULT_EXPORT_DIR = os.path.join("exports", "screenings")
+DEFAULT_BATCH_SIZE = 500  # Screenings read, held in memory and written per batch
+CHECKPOINT_FILE = "_checkpoint.json"  # Leading underscore: ignored by Parquet dataset readers
+
+SCHEMA = pa.schema([
+    ("session_id", pa.string()),
+    ("completed_at", pa.timestamp("ms", tz="UTC")),
+    ("full_name", pa.string()),
+    ("email", pa.string()),
+    ("phone", pa.string()),
+    ("location", pa.string()),
+    ("position", pa.string()),
+    ("tech_stack", pa.string()),
+    ("years", pa.float64()),
+    ("score", pa.float64()),
+    ("assessment", pa.string()),
+    ("language", pa.string()),
+    ("question_count", pa.int32()),
+    ("answered_count", pa.int32()),
+    ("follow_up_count", pa.int32()),
+    ("message_count", pa.int32()),
+    ("qa", pa.list_(pa.struct([
+        ("question", pa.string()),
+        ("answers", pa.list_(pa.string())),
+        ("complete", pa.bool_()),
+        ("follow_ups", pa.int32()),
+    ]))),
+    ("stage_seconds", pa.map_(pa.string(), pa.float64())),
+])
+
+
+def read_checkpoint(out_dir):
+    """Position of the last exported screening: {"completed_at", "session_id", "exported"}."""
+    try:
+        with open(os.path.join(out_dir, CHECKPOINT_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"completed_at": 0.0, "session_id": "", "exported": 0}
+
+
+def write_checkpoint(out_dir, checkpoint):
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def build_record(row, state):
+    """
+    One export row from an index record and the session's stored state dict (None for
+    screenings without a session, e.g. from the batch CLI).
+    """
+    interview = InterviewState.from_dict(state) if state else InterviewState()
+    info = interview.candidate_info
+    qa = [
+        {
+            "question": entry.question,
+            "answers": list(entry.answers),
+            "complete": entry.complete,
+            "follow_ups": max(0, len(entry.answers) - 1), # Every answer after the first followed a follow-up
+        }
+        for _, entry in sorted(interview.qa_map.items())
+    ]
+    return {
+        "session_id": row["session_id"],
+        "completed_at": datetime.fromtimestamp(row["completed_at"], timezone.utc),
+        "full_name": row["full_name"],
+        "email": row["email"],
+        "phone": info.get("Phone Number"),
+        "location": row["location"],
+        "position": row["position"],
+        "tech_stack": row["tech_stack"],
+        "years": row["years"],
+        "score": row["score"],
+        "assessment": row["assessment"],
+        "language": interview.selected_language if state else None,
+        "question_count": len(interview.questions),
+        "answered_count": sum(entry["complete"] for entry in qa),
+        "follow_up_count": sum(entry["follow_ups"] for entry in qa),
+        "message_count": len(interview.messages),
+        "qa": qa,
+        "stage_seconds": [(stage, float(seconds)) for stage, seconds in sorted(interview.stage_seconds.items())],
+    }
+
+
+def write_batch(out_dir, records, start):
+    """
+    Writes one batch, split into date partitions. File names derive from the batch's
+    starting checkpoint position, so re-running an interrupted batch replaces its files.
+    """
+    position = f"{int(start['completed_at'] * 1000):013d}-{hashlib.sha1(start['session_id'].encode()).hexdigest()[:8]}"
+    partitions = {}
+    for record in records:
+        partitions.setdefault(record["completed_at"].strftime("%Y-%m-%d"), []).append(record)
+    paths = []
+    for date, rows in sorted(partitions.items()):
+        directory = os.path.join(out_dir, f"date={date}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{position}.parquet")
+        tmp_path = os.path.join(directory, f"_part-{position}.parquet.tmp")
+        pq.write_table(pa.Table.from_pylist(rows, schema=SCHEMA), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+def export(index, store, out_dir=DEFAULT_EXPORT_DIR, batch_size=DEFAULT_BATCH_SIZE):
+    """Exports every screening completed since the checkpoint. Returns the number of rows written."""
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = read_checkpoint(out_dir)
+    written = 0
+    while True:
+        rows = index.completed_after(checkpoint["completed_at"], checkpoint["session_id"], batch_size)
+        if not rows:
+            break
+        write_batch(out_dir, [build_record(row, store.load(row["session_id"])) for row in rows], checkpoint)
+        checkpoint = {
+            "completed_at": rows[-1]["completed_at"],
+            "session_id": rows[-1]["session_id"],
+            "exported": checkpoint["exported"] + len(rows),
+        }
+        write_checkpoint(out_dir, checkpoint)
+        written += len(rows)
+        if len(rows) < batch_size:
+            break
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append newly completed screenings to partitioned Parquet files.")
+    parser.add_argument("--out", default=DEFAULT_EXPORT_DIR, help="export directory")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="screening index database")
+    parser.add_argument("--sessions", default=DEFAULT_DB_PATH, help="session database")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="screenings per batch")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    written = export(ScreeningIndex(args.index), SessionStore(args.sessions), args.out, max(1, args.batch_size))
+    print(f"Exported {written} screenings in {time.perf_counter() - started:.2f}s "
+          f"({read_checkpoint(args.out)['exported']} in total)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
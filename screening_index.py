@@ -0,0 +1,243 @@
+"""
+Recruiter search index over completed screenings.
+
+Each completed screening is upserted once, when its assessment is generated, into:
+
+- `screenings`: one row per session with numeric columns (years of experience,
+  assessment score) behind ordinary B-tree indexes for range queries;
+- `screening_tech`: an inverted index from normalized tech stack token to session;
+- `screenings_fts`: an SQLite FTS5 table over location, position, name and the
+  assessment text for word and phrase matching.
+
+Queries combine these in one SQL statement, so they stay in the milliseconds
+regardless of how many sessions exist.
+
+Usage:
+    python screening_index.py --tech python --tech sql --min-years 3 --min-score 3
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from screening import tech_stack_tokens
+
+DEFAULT_INDEX_PATH = os.getenv("TALENTSCOUT_INDEX_DB", "talent_scout_index.db")
+
+# "3/5", "3.5 / 5", "4 out of 5"
+SCORE_PATTERN = re.compile(r"(\d(?:\.\d+)?)\s*(?:/|out of)\s*5\b", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS screenings (
+    session_id TEXT PRIMARY KEY,
+    full_name TEXT,
+    email TEXT,
+    location TEXT,
+    position TEXT,
+    tech_stack TEXT,
+    years REAL,
+    score REAL,
+    assessment TEXT,
+    completed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS screenings_years ON screenings (years);
+CREATE INDEX IF NOT EXISTS screenings_score ON screenings (score);
+CREATE INDEX IF NOT EXISTS screenings_completed ON screenings (completed_at);
+CREATE TABLE IF NOT EXISTS screening_tech (
+    token TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    PRIMARY KEY (token, session_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS screenings_fts USING fts5 (
+    session_id UNINDEXED, location, position, full_name, assessment
+);
+"""
+
+# Columns returned by `search()`
+RESULT_COLUMNS = [
+    "session_id", "full_name", "email", "location", "position", "tech_stack", "years", "score", "completed_at"
+]
+
+
+def parse_years(value):
+    """Years of experience as a number, or None if the value does not contain one."""
+    match = re.search(r"\d+(?:\.\d+)?", str(value or ""))
+    return float(match.group(0)) if match else None
+
+
+def parse_score(assessment):
+    """The 1-5 competency score stated in an assessment, or None if there is none."""
+    match = SCORE_PATTERN.search(assessment or "")
+    return float(match.group(1)) if match else None
+
+
+def _known(value):
+    value = str(value or "").strip()
+    return "" if value.lower() == "n/a" else value
+
+
+def _fts_phrase(column, text):
+    """FTS5 query restricting a quoted phrase to one column."""
+    return f'{column} : "{text.replace(chr(34), " ")}"'
+
+
+class ScreeningIndex:
+    """SQLite index of completed screenings with a structured query API."""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, session_id, candidate_info, assessment, completed_at=None):
+        """Indexes (or re-indexes) one completed screening in a single transaction."""
+        row = {
+            "session_id": session_id,
+            "full_name": _known(candidate_info.get("Full Name")),
+            "email": _known(candidate_info.get("Email Address")),
+            "location": _known(candidate_info.get("Current Location")),
+            "position": _known(candidate_info.get("Desired Position(s)")),
+            "tech_stack": _known(candidate_info.get("Tech Stack")),
+            "years": parse_years(_known(candidate_info.get("Years of Experience"))),
+            "score": parse_score(assessment),
+            "assessment": assessment,
+            "completed_at": completed_at or time.time(),
+        }
+        tokens = tech_stack_tokens(row["tech_stack"])
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._remove(session_id)
+                self._conn.execute(
+                    f"INSERT INTO screenings ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                    list(row.values()),
+                )
+                self._conn.executemany(
+                    "INSERT INTO screening_tech (token, session_id) VALUES (?, ?)",
+                    [(token, session_id) for token in tokens],
+                )
+                self._conn.execute(
+                    "INSERT INTO screenings_fts (session_id, location, position, full_name, assessment) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (session_id, row["location"], row["position"], row["full_name"], assessment),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _remove(self, session_id):
+        for table in ("screenings", "screening_tech", "screenings_fts"):
+            self._conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+
+    def remove(self, session_id):
+        """Drops a screening from the index."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._remove(session_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def search(self, tech=(), min_years=None, max_years=None, location=None, position=None,
+               min_score=None, max_score=None, text=None, limit=50, offset=0):
+        """
+        Returns screenings matching every given filter, best score first. `tech` tokens
+        must all be in the candidate's stack; `location` and `position` match as phrases
+        within those fields; `text` is an FTS5 query over all text fields.
+        """
+        where, params = [], []
+        tokens = sorted({t for item in tech for t in tech_stack_tokens(item)})
+        if tokens:
+            where.append(
+                "s.session_id IN (SELECT session_id FROM screening_tech WHERE token IN "
+                f"({', '.join('?' * len(tokens))}) GROUP BY session_id HAVING COUNT(*) = ?)"
+            )
+            params += tokens + [len(tokens)]
+        for column, low, high in (("years", min_years, max_years), ("score", min_score, max_score)):
+            if low is not None:
+                where.append(f"s.{column} >= ?")
+                params.append(low)
+            if high is not None:
+                where.append(f"s.{column} <= ?")
+                params.append(high)
+
+        match = [_fts_phrase(column, value) for column, value in (("location", location), ("position", position))
+                 if value and value.strip()]
+        if text and text.strip():
+            match.append(f"({text})")
+        if match:
+            where.append("s.session_id IN (SELECT session_id FROM screenings_fts WHERE screenings_fts MATCH ?)")
+            params.append(" AND ".join(match))
+
+        sql = (
+            f"SELECT {', '.join('s.' + c for c in RESULT_COLUMNS)} FROM screenings s"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY s.score IS NULL, s.score DESC, s.completed_at DESC LIMIT ? OFFSET ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit, offset]).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, session_id):
+        """Full indexed record (including the assessment text) for one session, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM screenings WHERE session_id = ?", (session_id,)).fetchone()
+        return dict(row) if row else None
+
+    def completed_after(self, completed_at=0.0, session_id="", limit=500):
+        """
+        Full records of up to `limit` screenings completed after the position
+        (`completed_at`, `session_id`), oldest first, for tailing the index.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM screenings WHERE completed_at > ? OR (completed_at = ? AND session_id > ?) "
+                "ORDER BY completed_at, session_id LIMIT ?",
+                (completed_at, completed_at, session_id, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM screenings").fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search completed TalentScout screenings.")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="index database")
+    parser.add_argument("--tech", action="append", default=[], help="required tech stack token (repeatable)")
+    parser.add_argument("--min-years", type=float)
+    parser.add_argument("--max-years", type=float)
+    parser.add_argument("--location")
+    parser.add_argument("--position")
+    parser.add_argument("--min-score", type=float)
+    parser.add_argument("--max-score", type=float)
+    parser.add_argument("--text", help="FTS5 query over name, location, position and assessment")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    index = ScreeningIndex(args.index)
+    started = time.perf_counter()
+    results = index.search(
+        args.tech, args.min_years, args.max_years, args.location, args.position,
+        args.min_score, args.max_score, args.text, args.limit
+    )
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    print(f"{len(results)} of {index.count()} screenings in {(time.perf_counter() - started) * 1000:.1f}ms",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Typed interview state with a versioned, compact binary serialization.
+
+`InterviewState` replaces the loose bag of `st.session_state` keys. Questions are
+a list (no newline-joined string to re-split every turn), the Q/A map keeps int
+keys across round-trips, and `messages` is the single transcript buffer: the UI
+renders it and the model history is built as a view over it.
+
+Serialized snapshots are `MAGIC + version byte + zlib(compact JSON)`. Older
+schema versions (plain-JSON snapshots) and the legacy `talent_scout_session.json`
+layout are migrated on load.
+"""
+import json
+import os
+import uuid
+import zlib
+from dataclasses import dataclass, field, fields
+
+SCHEMA_VERSION = 2
+MAGIC = b"TSS"
+LEGACY_SESSION_FILE = "talent_scout_session.json"
+
+
+@dataclass(slots=True)
+class QAEntry:
+    """A technical question and every answer the candidate gave to it."""
+    question: str
+    answers: list = field(default_factory=list)
+    complete: bool = False
+
+
+@dataclass(slots=True)
+class InterviewState:
+    """Everything that describes one candidate's screening."""
+    messages: list = field(default_factory=list) # Transcript: [{"role": ..., "content": ...}]
+    candidate_info: dict = field(default_factory=dict)
+    info_requested: bool = False
+    info_collected: bool = False
+    tech_questions_asked: bool = False
+    questions: list = field(default_factory=list)
+    prepared_follow_ups: list = field(default_factory=list) # Follow-ups per question, in question order
+    conversation_ended: bool = False
+    qa_map: dict = field(default_factory=dict) # Question index -> QAEntry
+    current_question_idx: int = 0
+    awaiting_follow_up: bool = False
+    selected_language: str = "English"
+    stage_seconds: dict = field(default_factory=dict) # Conversation stage -> total turn time, for analytics
+    previous_session: str = "" # Returning candidate's earlier session (offered for resume/reuse at intake)
+    resume_code: str = "" # Shown to the candidate once; proves it is them when resuming from a later session
+
+    def field_values(self):
+        """JSON-compatible value of every field except the transcript."""
+        values = {}
+        for f in fields(self):
+            if f.name == "messages":
+                continue
+            value = getattr(self, f.name)
+            if f.name == "qa_map":
+                value = {str(k): {"question": qa.question, "answers": list(qa.answers), "complete": qa.complete}
+                         for k, qa in value.items()}
+            values[f.name] = value
+        return values
+
+    def to_dict(self):
+        return dict(self.field_values(), messages=self.messages)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a state from a current or legacy dict, migrating old field layouts."""
+        data = dict(data)
+
+        # Legacy layout: newline-joined questions and a string-keyed "Youtube_map"
+        if "questions" not in data and "generated_tech_questions" in data:
+            data["questions"] = [q for q in data["generated_tech_questions"].split("\n") if q.strip()]
+        if "qa_map" not in data and "Youtube_map" in data:
+            data["qa_map"] = data["Youtube_map"]
+
+        state = cls(**{f.name: data[f.name] for f in fields(cls) if f.name in data})
+        state.qa_map = {
+            int(k): qa if isinstance(qa, QAEntry) else QAEntry(
+                question=qa.get("question", ""), answers=list(qa.get("answers", [])), complete=qa.get("complete", False)
+            )
+            for k, qa in state.qa_map.items()
+        }
+        return state
+
+
+def pack(data):
+    """Encodes a state dict as a versioned, compressed binary snapshot."""
+    body = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return MAGIC + bytes([SCHEMA_VERSION]) + zlib.compress(body)
+
+
+def unpack(blob):
+    """Decodes a snapshot written by `pack`, or a plain JSON snapshot from schema version 1."""
+    if isinstance(blob, (bytes, bytearray)) and blob[:len(MAGIC)] == MAGIC:
+        version = blob[len(MAGIC)]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"Session snapshot schema v{version} is newer than supported v{SCHEMA_VERSION}")
+        data = json.loads(zlib.decompress(blob[len(MAGIC) + 1:]).decode("utf-8"))
+    else:
+        data = json.loads(blob) # Schema v1: uncompressed JSON text
+    return InterviewState.from_dict(data).to_dict()
+
+
+def import_legacy_file(store, path=LEGACY_SESSION_FILE):
+    """
+    One-time migration of the old single shared JSON state file into the session store
+    under a random session ID, so only the operator (who is told the ID) can resume it.
+    The file is renamed to `<path>.imported` only once it has been read and stored, so
+    a file that cannot be parsed raises and stays where it is. Of concurrent imports,
+    the one that renames it wins and the others drop their copy. Returns the new
+    session ID, or None.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = InterviewState.from_dict(json.load(f))
+    except FileNotFoundError:
+        return None # No legacy file, or it has been imported
+    session_id = uuid.uuid4().hex
+    store.append(session_id, state.messages, state.field_values())
+    store.compact(session_id)
+    try:
+        os.replace(path, path + ".imported")
+    except FileNotFoundError:
+        store.delete(session_id) # Another process imported it first
+        return None
+    return session_id
@@ -0,0 +1,173 @@
+"""
+Per-session, append-only persistence for TalentScout conversations.
+
+Every browser session gets its own session ID. Each turn appends only the new
+messages and the state fields that changed to a journal; a compacted snapshot is
+written every `SNAPSHOT_EVERY` journal entries so loading a session means reading
+one snapshot plus a short journal tail. Snapshots are stored in the compact,
+versioned binary format from `session_model`. SQLite runs in WAL mode so
+concurrent candidates never block each other's readers or corrupt a shared file.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import session_model
+
+DEFAULT_DB_PATH = os.getenv("TALENTSCOUT_DB", "talent_scout_sessions.db")
+SNAPSHOT_EVERY = 50  # Journal entries between compactions
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    session_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    state BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class SessionStore:
+    """SQLite-backed journal + snapshot store keyed by session ID."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, snapshot_every=SNAPSHOT_EVERY,
+                 encode=session_model.pack, decode=session_model.unpack):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.encode = encode # Snapshot state dict -> bytes
+        self.decode = decode # Snapshot bytes (or older JSON text) -> state dict
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _last_seq(self, session_id):
+        row = self._conn.execute(
+            "SELECT MAX(seq) FROM journal WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row[0] is not None:
+            return row[0]
+        row = self._conn.execute(
+            "SELECT seq FROM snapshots WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def append(self, session_id, messages=(), state_delta=None):
+        """Appends new messages and changed state fields for one turn in a single transaction."""
+        entries = [("message", msg) for msg in messages]
+        if state_delta:
+            entries.append(("state", state_delta))
+        if not entries:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._last_seq(session_id)
+                rows = []
+                for kind, payload in entries:
+                    seq += 1
+                    rows.append((session_id, seq, kind, json.dumps(payload, ensure_ascii=False), now))
+                self._conn.executemany(
+                    "INSERT INTO journal (session_id, seq, kind, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if self._journal_length(session_id) >= self.snapshot_every:
+            self.compact(session_id)
+
+    def _journal_length(self, session_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM journal WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def _read(self, session_id):
+        """Returns (state, last_seq) rebuilt from the snapshot plus the journal tail."""
+        row = self._conn.execute(
+            "SELECT seq, state FROM snapshots WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row:
+            seq, state = row[0], self.decode(row[1])
+        else:
+            seq, state = 0, None
+
+        tail = self._conn.execute(
+            "SELECT seq, kind, payload FROM journal WHERE session_id = ? AND seq > ? ORDER BY seq",
+            (session_id, seq),
+        ).fetchall()
+        if state is None and not tail:
+            return None, 0
+
+        state = state or {"messages": []}
+        for seq, kind, payload in tail:
+            payload = json.loads(payload)
+            if kind == "message":
+                state["messages"].append(payload)
+            elif kind == "state":
+                state.update(payload)
+        return state, seq
+
+    def load(self, session_id):
+        """Returns the full state dict for a session, or None if it has never been saved."""
+        with self._lock:
+            state, _ = self._read(session_id)
+        return state
+
+    def compact(self, session_id):
+        """Folds the journal into a fresh snapshot and drops the entries it covers."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                state, seq = self._read(session_id)
+                if state is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO snapshots (session_id, seq, state, updated_at) VALUES (?, ?, ?, ?)",
+                        (session_id, seq, self.encode(state), time.time()),
+                    )
+                    self._conn.execute(
+                        "DELETE FROM journal WHERE session_id = ? AND seq <= ?", (session_id, seq)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stored_bytes(self, session_id):
+        """Bytes a session occupies in the store: its snapshot plus the journal tail."""
+        with self._lock:
+            journal = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(CAST(payload AS BLOB))), 0) FROM journal WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            snapshot = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(state)), 0) FROM snapshots WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+        return journal + snapshot
+
+    def delete(self, session_id):
+        """Removes every trace of a session."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM journal WHERE session_id = ?", (session_id,))
+                self._conn.execute("DELETE FROM snapshots WHERE session_id = ?", (session_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise